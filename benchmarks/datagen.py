@@ -0,0 +1,87 @@
+"""Synthetic datasets with the SafeData sample schema, at any size.
+
+    python -m benchmarks.datagen --rows 1e7 --output data/bench_1e7.parquet
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from src.data_io import TableWriter
+
+DISEASES = ['None', 'Diabetes', 'Hypertension', 'Asthma', 'Arthritis', 'Migraine', 'Cancer', 'Obesity']
+
+
+def generate_dataset(n_rows, age_cardinality=72, location_cardinality=50, disease_cardinality=3,
+                     seed=0, first_id=1):
+    """One DataFrame with columns id, name, age, gender, location, income, disease.
+
+    QI cardinality is controlled by the number of distinct ages (starting at
+    18) and locations; income depends on age so utility metrics have some
+    signal to preserve.
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(first_id, first_id + n_rows)
+    age = 18 + rng.integers(0, age_cardinality, n_rows)
+    # Zipf-like city sizes, as in real location data
+    weights = 1.0 / np.arange(1, location_cardinality + 1)
+    location = rng.choice(location_cardinality, n_rows, p=weights / weights.sum())
+    income = np.round(20000 + 900 * (age - 18) + rng.normal(0, 15000, n_rows), -2).clip(5000)
+    diseases = DISEASES[:disease_cardinality]
+    return pd.DataFrame({
+        'id': ids,
+        'name': pd.Series(ids).map('Person{}'.format),
+        'age': age,
+        'gender': pd.Categorical.from_codes(rng.integers(0, 2, n_rows), ['F', 'M']),
+        'location': pd.Categorical.from_codes(location, [f"City{i}" for i in range(location_cardinality)]),
+        'income': income.astype(np.int64),
+        'disease': pd.Categorical.from_codes(rng.integers(0, len(diseases), n_rows), diseases),
+    })
+
+
+def generate_ground_truth(n_rows, seed=0, first_id=1):
+    """Ground truth with the sample schema (id, real_name, real_address, phone)"""
+    rng = np.random.default_rng(seed + first_id)
+    ids = pd.Series(np.arange(first_id, first_id + n_rows))
+    return pd.DataFrame({
+        'id': ids,
+        'real_name': ids.map('Name{}'.format),
+        'real_address': ids.map('{} Main St'.format),
+        'phone': 9000000000 + rng.integers(0, 999999999, n_rows),
+    })
+
+
+def write_dataset(path, n_rows, chunk_size=1000000, seed=0, **cardinality):
+    """Write ``n_rows`` rows chunk by chunk so datasets larger than RAM can be built"""
+    with TableWriter(path) as writer:
+        for chunk_index, start in enumerate(range(0, n_rows, chunk_size)):
+            size = min(chunk_size, n_rows - start)
+            writer.write(generate_dataset(size, seed=seed + chunk_index, first_id=start + 1, **cardinality))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a SafeData benchmark dataset")
+    parser.add_argument("--rows", type=float, required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--ground-truth")
+    parser.add_argument("--age-cardinality", type=int, default=72)
+    parser.add_argument("--location-cardinality", type=int, default=50)
+    parser.add_argument("--disease-cardinality", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    n_rows = int(args.rows)
+    write_dataset(args.output, n_rows, args.chunk_size, args.seed,
+                  age_cardinality=args.age_cardinality,
+                  location_cardinality=args.location_cardinality,
+                  disease_cardinality=args.disease_cardinality)
+    if args.ground_truth:
+        with TableWriter(args.ground_truth) as writer:
+            for start in range(0, n_rows, args.chunk_size):
+                writer.write(generate_ground_truth(min(args.chunk_size, n_rows - start), args.seed, start + 1))
+
+
+if __name__ == "__main__":
+    main()
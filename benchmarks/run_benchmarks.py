@@ -0,0 +1,250 @@
+"""Time and memory-profile every public stage method at increasing data sizes.
+
+    python -m benchmarks.run_benchmarks --sizes 1e3 1e4 1e5 --output bench.jsonl
+    python -m benchmarks.run_benchmarks --sizes 1e5 --compare bench.jsonl
+    python -m benchmarks.run_benchmarks --sizes --imports
+
+Each result is one JSON line tagged with the git commit, so runs from
+different commits can be compared with ``--compare``. Sizes above
+``--max-in-memory`` are written to disk in chunks and run through the
+streaming pipeline instead of the in-memory stage methods. ``--imports``
+also times a cold import of every entry-point module in a fresh
+interpreter and records which heavy dependencies it pulled in.
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from benchmarks.datagen import generate_dataset, generate_ground_truth, write_dataset
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(fn, memory=True):
+    """Wall time of one call, plus its peak traced allocation in a second call"""
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return seconds, peak
+
+
+def stage_benchmarks(config, data, ground_truth):
+    """Callables for every public stage method, each starting from a cold object
+
+    The artifact cache is disabled in ``main`` and every utility call gets a
+    fresh UtilityMeasurer, so no call is answered from a memo filled by the
+    setup or by an earlier call.
+    """
+    from src.risk_assessment import RiskAssessor
+    from src.privacy_enhancement import PrivacyEnhancer
+    from src.utility_measurement import UtilityMeasurer
+    from src.reporting import ReportGenerator
+
+    def assessor():
+        ra = RiskAssessor(config)
+        ra.data = data
+        ra.ground_truth = ground_truth
+        return ra
+
+    pe = PrivacyEnhancer(config)
+    privacy = config['privacy']
+    protected = pe.enhance_privacy(data)
+    um = UtilityMeasurer(config)
+    risk_report = assessor().generate_risk_report()
+    utility_report = um.generate_utility_report(data, protected)
+    sketches = um.sketch_pair(data, protected)
+    rg = ReportGenerator(config)
+
+    return {
+        'RiskAssessor.calculate_k_anonymity': lambda: assessor().calculate_k_anonymity(),
+        'RiskAssessor.simulate_linkage_attack': lambda: assessor().simulate_linkage_attack(),
+        'RiskAssessor.assess_prosecutor_risk': lambda: assessor().assess_prosecutor_risk(),
+        'RiskAssessor.assess_journalist_risk': lambda: assessor().assess_journalist_risk(),
+        'RiskAssessor.assess_l_diversity': lambda: assessor().assess_l_diversity(),
+        'RiskAssessor.assess_t_closeness': lambda: assessor().assess_t_closeness(),
+        'RiskAssessor.generate_risk_report': lambda: assessor().generate_risk_report(),
+        'PrivacyEnhancer.apply_k_anonymity':
+            lambda: pe.apply_k_anonymity(data, privacy['k_anonymity']['k_value']),
+        'PrivacyEnhancer.apply_differential_privacy':
+            lambda: pe.apply_differential_privacy(data, privacy['differential_privacy']['epsilon'], charge=False),
+        'PrivacyEnhancer.generate_synthetic_data':
+            lambda: pe.generate_synthetic_data(data, len(data)),
+        'PrivacyEnhancer.enhance_privacy': lambda: pe.enhance_privacy(data),
+        'UtilityMeasurer.measure_statistical_similarity':
+            lambda: UtilityMeasurer(config).measure_statistical_similarity(data, protected),
+        'UtilityMeasurer.measure_ml_utility': lambda: UtilityMeasurer(config).measure_ml_utility(data, protected),
+        'UtilityMeasurer.create_comparison_plots':
+            lambda: UtilityMeasurer(config).create_comparison_plots(sketches[0], sketches[1]),
+        'UtilityMeasurer.generate_utility_report':
+            lambda: UtilityMeasurer(config).generate_utility_report(data, protected),
+        'ReportGenerator.generate_html_report': lambda: rg.generate_html_report(risk_report, utility_report),
+        'ReportGenerator.generate_pdf_report': lambda: rg.generate_pdf_report(risk_report, utility_report),
+    }
+
+
+IMPORT_MODULES = ['src.cli', 'src.risk_assessment', 'src.privacy_enhancement',
+                  'src.utility_measurement', 'src.reporting']
+HEAVY_MODULES = ['sklearn', 'scipy', 'matplotlib', 'seaborn', 'fpdf', 'pyarrow']
+
+
+def import_time(module):
+    """Seconds to import ``module`` in a fresh interpreter, and the heavy modules it loaded"""
+    script = (
+        "import sys, time, json\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "seconds = time.perf_counter() - start\n"
+        f"print(json.dumps([seconds, [m for m in {HEAVY_MODULES!r} if m in sys.modules]]))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_size(config, n_rows, args, emit):
+    cardinality = dict(age_cardinality=args.age_cardinality,
+                       location_cardinality=args.location_cardinality,
+                       disease_cardinality=args.disease_cardinality)
+
+    if n_rows > args.max_in_memory:
+        from src.streaming import StreamingPipeline
+        source = os.path.join(args.workdir, f"bench_{n_rows}.parquet")
+        output = os.path.join(args.workdir, f"bench_{n_rows}_protected.parquet")
+        write_dataset(source, n_rows, seed=args.seed, **cardinality)
+        pipeline = StreamingPipeline(config)
+        seconds, peak = measure(lambda: pipeline.run(source, output), memory=not args.no_memory)
+        emit('StreamingPipeline.run', n_rows, seconds, peak)
+        return
+
+    data = generate_dataset(n_rows, seed=args.seed, **cardinality)
+    ground_truth = generate_ground_truth(n_rows, seed=args.seed)
+    benchmarks = stage_benchmarks(config, data, ground_truth)
+    for name, fn in benchmarks.items():
+        if args.stages and not any(stage in name for stage in args.stages):
+            continue
+        try:
+            seconds, peak = measure(fn, memory=not args.no_memory)
+        except Exception as e:
+            emit(name, n_rows, None, None, error=repr(e))
+            continue
+        emit(name, n_rows, seconds, peak)
+
+
+def compare(results, baseline_file):
+    """Print the time ratio of each (method, rows) against a baseline results file"""
+    baseline = {}
+    with open(baseline_file) as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get('seconds') is not None:
+                baseline[(record['method'], record['rows'])] = record
+    print(f"{'method':<50} {'rows':>10} {'base s':>10} {'new s':>10} {'ratio':>7}")
+    for record in results:
+        base = baseline.get((record['method'], record['rows']))
+        if base is None or record['seconds'] is None:
+            continue
+        ratio = record['seconds'] / base['seconds'] if base['seconds'] > 0 else float('inf')
+        flag = "  <-- slower" if ratio > 1.2 else ""
+        print(f"{record['method']:<50} {record['rows']:>10} {base['seconds']:>10.4f} "
+              f"{record['seconds']:>10.4f} {ratio:>7.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SafeData pipeline stages")
+    parser.add_argument("--sizes", type=float, nargs="*", default=[1e3, 1e4, 1e5])
+    parser.add_argument("--stages", nargs="*", help="only run methods whose name contains one of these")
+    parser.add_argument("--config", default=os.path.join(REPO_ROOT, "config", "config.yaml"))
+    parser.add_argument("--output", help="append JSON lines results to this file")
+    parser.add_argument("--compare", help="results file from another commit to compare against")
+    parser.add_argument("--workdir", help="directory for reports and generated files (default: temporary)")
+    parser.add_argument("--max-in-memory", type=float, default=1e7)
+    parser.add_argument("--age-cardinality", type=int, default=72)
+    parser.add_argument("--location-cardinality", type=int, default=50)
+    parser.add_argument("--disease-cardinality", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--imports", action="store_true", help="also time cold imports of the entry points")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    config = copy.deepcopy(config)
+    config['output']['show_plots'] = True
+    # Time the computations, not hits on artifacts an earlier call cached
+    config['cache']['enabled'] = False
+    # Reproducible noise across runs; never use a fixed seed for a real release
+    config['privacy']['differential_privacy']['seed'] = args.seed
+
+    # Stage methods write to relative paths such as reports/; keep them out of the tree.
+    # Paths given by the user stay relative to where the command was run.
+    args.output = os.path.abspath(args.output) if args.output else None
+    args.compare = os.path.abspath(args.compare) if args.compare else None
+    args.workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="safedata-bench-"))
+    os.makedirs(os.path.join(args.workdir, "reports"), exist_ok=True)
+    os.chdir(args.workdir)
+
+    environment = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    results = []
+    output = open(args.output, "a") if args.output else None
+
+    def emit(method, rows, seconds, peak, **extra):
+        record = dict(environment, method=method, rows=rows, seconds=seconds, peak_bytes=peak,
+                      rows_per_second=rows / seconds if seconds else None, **extra)
+        results.append(record)
+        line = json.dumps(record)
+        print(line, file=output or sys.stdout, flush=True)
+        if output:
+            status = record.get('error') or f"{seconds:.4f}s"
+            print(f"{method:<50} {rows:>10} {status}")
+
+    try:
+        if args.imports:
+            for module in IMPORT_MODULES:
+                seconds, loaded = import_time(module)
+                emit(f"import {module}", 0, seconds, None, heavy_modules=loaded)
+        for size in args.sizes:
+            run_size(config, int(size), args, emit)
+    finally:
+        if output:
+            output.close()
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+import pandas as pd
+
+
+def dataset_fingerprint(frame):
+    """Content hash of a DataFrame: column names, dtypes and every value"""
+    digest = hashlib.sha1()
+    digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in frame.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def artifact_key(fingerprint, name, **params):
+    """Cache key for one artifact of a dataset computed with ``params``"""
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return f"{fingerprint}-{name}-{digest}"
+
+
+class ArtifactCache:
+    """On-disk pickle cache with least-recently-used eviction by total size.
+
+    Every artifact is one file; reading an entry refreshes its modification
+    time, and writing one evicts the stalest files until the directory is
+    within ``max_bytes``.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config):
+        """The configured cache, or None when caching is disabled"""
+        settings = config.get('cache') or {}
+        if not settings.get('enabled'):
+            return None
+        return cls(settings.get('directory', '.safedata_cache'),
+                   int(settings.get('max_size_mb', 512) * 1024 * 1024))
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return default
+        os.utime(path)
+        return value
+
+    def put(self, key, value):
+        # Write to a temporary file first so readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its budget"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
@@ -0,0 +1,254 @@
+"""SafeData command line.
+
+    python main.py [--config PATH] [--profile] [COMMAND]
+
+Commands: ``risk`` (risk report of the input), ``protect`` (write the
+protected output), ``utility`` (compare the input with the protected
+output), ``report`` (risk and utility of the existing output rendered as a
+report), ``run`` (the whole pipeline, the default), ``sweep`` (the
+parameter sweep), ``ingest DELTA_FILE`` (add new records to the
+incremental state and append them to the output) and ``serve`` (a local
+JSON service answering risk and utility queries from warm datasets). Stage modules and their heavy dependencies (scikit-learn,
+scipy, matplotlib, fpdf) are imported only by the commands, and with the
+config settings, that use them.
+"""
+import argparse
+import json
+import sys
+
+import yaml
+
+from src.profiling import Profiler, activate, deactivate
+
+
+def load_config(path):
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def load_input(config):
+    from src.risk_assessment import RiskAssessor
+    from src.data_io import projected_columns
+    ra = RiskAssessor(config)
+    settings = config['data_settings']
+    columns = None
+    if settings.get('project_columns'):
+        columns = projected_columns(settings['input_file'], config, settings.get('input_format'))
+    ra.load_data(settings['input_file'], settings['ground_truth_file'], columns)
+    return ra
+
+
+def load_protected(config):
+    from src.data_io import read_table
+    settings = config['data_settings']
+    return read_table(settings['output_file'], settings.get('output_format'),
+                      memory_map=settings.get('memory_map', True))
+
+
+def assess_risk(config, data, ground_truth=None):
+    from src.risk_assessment import RiskAssessor
+    ra = RiskAssessor(config)
+    ra.data = data
+    if ground_truth is not None:
+        ra.ground_truth = ground_truth
+    return ra.generate_risk_report()
+
+
+def protect(config, data):
+    # Synthetic data is streamed to the output file; only a sample of it comes back
+    from src.privacy_enhancement import PrivacyEnhancer
+    pe = PrivacyEnhancer(config)
+    return pe.enhance_privacy(data, config['data_settings']['output_file'],
+                              config['data_settings'].get('output_format'))
+
+
+def measure_utility(config, data, protected_data):
+    from src.utility_measurement import UtilityMeasurer
+    um = UtilityMeasurer(config)
+    return um.generate_utility_report(data, protected_data)
+
+
+def run_in_memory(config):
+    from src.scheduler import TaskScheduler
+
+    # Load data
+    ra = load_input(config)
+    data = ra.data
+
+    # Risk assessment and privacy enhancement only need the raw data and
+    # run concurrently; utility measurement waits for the protected data
+    scheduler = TaskScheduler(config)
+    risk_report = scheduler.add('risk_assessment', assess_risk, config, data, getattr(ra, 'ground_truth', None))
+    protected_data = scheduler.add('privacy_enhancement', protect, config, data)
+    utility_report = scheduler.add('utility_measurement', measure_utility, config, data, protected_data)
+    results = scheduler.run()
+
+    timings = ", ".join(f"{name}={seconds:.2f}s" for name, seconds in scheduler.timings.items())
+    print(f"Stage timings: {timings}")
+    return results[risk_report.name], results[utility_report.name]
+
+
+def write_report(config, risk_report, utility_report, profiler=None):
+    from src.reporting import ReportGenerator
+    rg = ReportGenerator(config)
+    profile = profiler.summary() if profiler is not None else None
+    report_path = rg.generate_report(risk_report, utility_report, profile)
+    print(f"Report generated: {report_path}")
+    return report_path
+
+
+def print_json(report):
+    # numpy scalars -> Python numbers; anything else unserializable -> str
+    json.dump(report, sys.stdout, indent=2, default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+    print()
+
+
+def cmd_risk(config, args, profiler=None):
+    ra = load_input(config)
+    print_json(ra.generate_risk_report())
+
+
+def cmd_protect(config, args, profiler=None):
+    settings = config['data_settings']
+    if (config.get('processing') or {}).get('streaming'):
+        # Protect chunk by chunk without loading the whole input
+        from src.streaming import StreamingPipeline
+        from src.privacy_enhancement import PrivacyEnhancer
+        from src.data_io import TableWriter
+        pipeline = StreamingPipeline(config)
+        enhancer = PrivacyEnhancer(config)
+        ranges = pipeline.noise_ranges(settings['input_file'])
+        with TableWriter(settings['output_file'], settings.get('output_format')) as writer:
+            for index, chunk in enumerate(pipeline.iter_chunks(settings['input_file'])):
+                writer.write(pipeline.protect_chunk(enhancer, chunk, index, ranges))
+    else:
+        protect(config, load_input(config).data)
+    print(f"Protected data written to: {settings['output_file']}")
+
+
+def cmd_utility(config, args, profiler=None):
+    data = load_input(config).data
+    utility_report = measure_utility(config, data, load_protected(config))
+    # The rendered SVG plots only belong in reports
+    utility_report.pop('plots', None)
+    print_json(utility_report)
+
+
+def cmd_report(config, args, profiler=None):
+    ra = load_input(config)
+    risk_report = ra.generate_risk_report()
+    utility_report = measure_utility(config, ra.data, load_protected(config))
+    write_report(config, risk_report, utility_report, profiler)
+
+
+def cmd_run(config, args, profiler=None):
+    if (config.get('processing') or {}).get('streaming'):
+        # Streaming mode: process the input chunk by chunk
+        from src.streaming import StreamingPipeline
+        pipeline = StreamingPipeline(config)
+        risk_report, utility_report = pipeline.run(
+            config['data_settings']['input_file'],
+            config['data_settings']['output_file'],
+            config['data_settings']['ground_truth_file']
+        )
+    else:
+        risk_report, utility_report = run_in_memory(config)
+
+    write_report(config, risk_report, utility_report, profiler)
+
+
+def cmd_sweep(config, args, profiler=None):
+    # Evaluate the configured grid of privacy settings against one load
+    from src.sweep import ParameterSweep
+    data = load_input(config).data
+    sweep = ParameterSweep(config)
+    results = sweep.run(data)
+    print(f"Evaluated {len(results)} configurations in {sum(sweep.timings.values()):.2f}s of task time")
+    print("Pareto frontier:")
+    print(results[results['pareto']].sort_values('prosecutor_risk').to_string(index=False))
+    if sweep.output_file:
+        print(f"Sweep results written to: {sweep.output_file}")
+
+
+def cmd_ingest(config, args, profiler=None):
+    # Update the persisted state with the new records only
+    from src.incremental import IncrementalPipeline
+    pipeline = IncrementalPipeline(config)
+    try:
+        report = pipeline.ingest(args.delta_file)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+    print_json(report)
+
+
+def cmd_serve(config, args, profiler=None):
+    # Long-running: datasets stay loaded between queries
+    from src.service import create_server
+    server = create_server(config, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"Serving on http://{host}:{port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+COMMANDS = {
+    'risk': (cmd_risk, "print the risk report of the input data as JSON"),
+    'protect': (cmd_protect, "apply the enabled privacy techniques and write the output file"),
+    'utility': (cmd_utility, "print the utility of the existing output file as JSON"),
+    'report': (cmd_report, "render the risk and utility of the existing output file as a report"),
+    'run': (cmd_run, "run the whole pipeline and write the report (default)"),
+    'sweep': (cmd_sweep, "evaluate the grid in the 'sweep' config section"),
+    'ingest': (cmd_ingest, "add the records of a delta file to the incremental state and output"),
+    'serve': (cmd_serve, "answer risk and utility queries over HTTP from datasets kept in memory"),
+}
+
+# Positional arguments and options of individual commands
+COMMAND_ARGUMENTS = {
+    'ingest': [(("delta_file",), {'help': "file with the new records (same columns as the input)"})],
+    'serve': [(("--host",), {'help': "address to bind (default: service.host)"}),
+              (("--port",), {'type': int, 'help': "port to listen on (default: service.port)"})],
+}
+
+
+def build_parser():
+    # Global options are accepted before or after the command
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config", default=argparse.SUPPRESS, help="path to the YAML config")
+    common.add_argument("--profile", action="store_true", default=argparse.SUPPRESS,
+                        help="record per-stage timings, memory and row counts (see 'profiling' in the config)")
+
+    parser = argparse.ArgumentParser(prog="safedata", description="Assess and reduce the privacy risk of a dataset")
+    parser.add_argument("--config", default="config/config.yaml", help="path to the YAML config")
+    parser.add_argument("--profile", action="store_true",
+                        help="record per-stage timings, memory and row counts (see 'profiling' in the config)")
+    parser.add_argument("--sweep", action="store_true", help="same as the sweep command")
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    for name, (_, help_text) in COMMANDS.items():
+        subparser = subparsers.add_parser(name, parents=[common], help=help_text, description=help_text)
+        for flags, options in COMMAND_ARGUMENTS.get(name, []):
+            subparser.add_argument(*flags, **options)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    command = args.command or ('sweep' if args.sweep else 'run')
+    config = load_config(args.config)
+
+    profiler = Profiler.from_config(config, enabled=args.profile)
+    if profiler is not None:
+        activate(profiler)
+    try:
+        COMMANDS[command][0](config, args, profiler)
+    finally:
+        if profiler is not None:
+            deactivate()
+            print(f"Profile trace written to: {profiler.write_trace()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import os
+
+import pandas as pd
+
+FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather',
+    '.ipc': 'feather',
+}
+
+
+def _require_pyarrow(fmt):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError(f"The {fmt} format requires pyarrow (pip install pyarrow)")
+
+
+def detect_format(path, fmt=None):
+    """Resolve the table format from an explicit name or the file extension"""
+    if fmt:
+        return 'feather' if fmt in ('arrow', 'ipc') else fmt
+    return FORMATS.get(os.path.splitext(path)[1].lower(), 'csv')
+
+
+def required_columns(config):
+    """Columns the pipeline stages read: id, QIs, sensitive attributes and join keys"""
+    risk = config['risk_settings']
+    linkage = risk.get('linkage') or {}
+    columns = ['id'] + risk['quasi_identifiers'] + risk.get('sensitive_attributes', []) \
+        + linkage.get('join_keys', ['id'])
+    return list(dict.fromkeys(columns))
+
+
+def schema(path, fmt=None):
+    """Column names and pandas dtypes of a table without loading its rows"""
+    fmt = detect_format(path, fmt)
+    if fmt == 'csv':
+        return pd.read_csv(path, nrows=1000).dtypes.to_dict()
+    _require_pyarrow(fmt)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        arrow_schema = pq.read_schema(path)
+    else:
+        import pyarrow as pa
+        with pa.memory_map(path) as source:
+            arrow_schema = pa.ipc.open_file(source).schema
+    return arrow_schema.empty_table().to_pandas().dtypes.to_dict()
+
+
+def projected_columns(path, config, fmt=None):
+    """The required columns plus every numeric column present in the table"""
+    dtypes = schema(path, fmt)
+    wanted = set(required_columns(config))
+    return [col for col, dtype in dtypes.items()
+            if col in wanted or pd.api.types.is_numeric_dtype(dtype)]
+
+
+def _apply_dtypes(frame, dtypes):
+    if not dtypes:
+        return frame
+    dtypes = {col: dtype for col, dtype in dtypes.items() if col in frame.columns}
+    return frame.astype(dtypes) if dtypes else frame
+
+
+def read_table(path, fmt=None, columns=None, dtypes=None, memory_map=True):
+    """Read a CSV, Parquet or Feather/Arrow IPC file into a DataFrame.
+
+    ``columns`` projects the read to a subset of columns (columns missing
+    from the file are ignored) and ``dtypes`` maps columns to pandas dtypes,
+    e.g. ``category`` for low-cardinality text. Feather/Arrow IPC files are
+    memory-mapped unless ``memory_map`` is false.
+    """
+    fmt = detect_format(path, fmt)
+    if columns is not None:
+        available = schema(path, fmt)
+        columns = [col for col in available if col in set(columns)]
+
+    if fmt == 'csv':
+        return pd.read_csv(path, usecols=columns, dtype=dtypes)
+
+    _require_pyarrow(fmt)
+    if fmt == 'parquet':
+        frame = pd.read_parquet(path, columns=columns)
+    else:
+        import pyarrow.feather as feather
+        frame = feather.read_table(path, columns=columns, memory_map=memory_map).to_pandas()
+    return _apply_dtypes(frame, dtypes)
+
+
+def iter_table(path, chunk_size, fmt=None, columns=None, dtypes=None):
+    """Yield a table as DataFrames of at most ``chunk_size`` rows"""
+    fmt = detect_format(path, fmt)
+    if columns is not None:
+        available = schema(path, fmt)
+        columns = [col for col in available if col in set(columns)]
+
+    if fmt == 'csv':
+        yield from pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunk_size)
+        return
+
+    _require_pyarrow(fmt)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns)
+        for batch in batches:
+            yield _apply_dtypes(batch.to_pandas(), dtypes)
+    else:
+        import pyarrow as pa
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+            if columns is not None:
+                table = table.select(columns)
+            for batch in table.to_batches(max_chunksize=chunk_size):
+                yield _apply_dtypes(batch.to_pandas(), dtypes)
+
+
+def write_table(frame, path, fmt=None):
+    """Write a DataFrame as CSV, Parquet or Feather/Arrow IPC"""
+    fmt = detect_format(path, fmt)
+    if fmt == 'csv':
+        frame.to_csv(path, index=False)
+    elif fmt == 'parquet':
+        _require_pyarrow(fmt)
+        frame.to_parquet(path, index=False)
+    else:
+        _require_pyarrow(fmt)
+        frame.reset_index(drop=True).to_feather(path)
+
+
+class TableWriter:
+    """Append DataFrames to a CSV, Parquet or Arrow IPC file chunk by chunk
+
+    With ``append`` the rows are added to an existing CSV file instead of
+    replacing it; Parquet and Arrow IPC files cannot be extended in place.
+    """
+
+    def __init__(self, path, fmt=None, append=False):
+        self.path = path
+        self.fmt = detect_format(path, fmt)
+        if append and self.fmt != 'csv':
+            raise ValueError(f"Cannot append to {self.fmt} output; use a CSV output file")
+        self._writer = None
+        self._schema = None
+        self._started = append and os.path.exists(path) and os.path.getsize(path) > 0
+
+    def write(self, frame):
+        if self.fmt == 'csv':
+            frame.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        else:
+            _require_pyarrow(self.fmt)
+            import pyarrow as pa
+            if self._writer is None:
+                # Chunks carry different category sets, so store plain values
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                self._schema = pa.schema([
+                    pa.field(field.name, field.type.value_type) if pa.types.is_dictionary(field.type) else field
+                    for field in table.schema
+                ])
+                table = table.cast(self._schema)
+                if self.fmt == 'parquet':
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(self.path, self._schema)
+                else:
+                    self._writer = pa.ipc.new_file(self.path, self._schema)
+            else:
+                table = pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False)
+            self._writer.write_table(table)
+        self._started = True
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from src.qi_index import _column_codes
+
+
+def _ranked_codes(series):
+    """Codes numbering the distinct values of a numeric column in ascending order"""
+    codes, uniques = pd.factorize(series)
+    ranks = np.empty(len(uniques), dtype=np.int64)
+    ranks[np.argsort(np.asarray(uniques), kind='stable')] = np.arange(len(uniques))
+    codes = codes.astype(np.int64)
+    valid = codes >= 0
+    codes[valid] = ranks[codes[valid]]
+    return codes, len(uniques)
+
+
+def _pair_counts(class_codes, value_codes, n_values):
+    """Distinct (class, value) pairs and their counts, sorted by class then value"""
+    valid = (class_codes >= 0) & (value_codes >= 0)
+    keys = class_codes[valid] * n_values + value_codes[valid]
+    # Sorting beats hashing here: numeric attributes make most pairs distinct
+    pairs, counts = np.unique(keys, return_counts=True)
+    return pairs // n_values, pairs % n_values, counts
+
+
+def _ordered_emd(pair_class, pair_value, pair_prob, class_end, global_prob):
+    """Ordered earth mover's distance of every class from the overall distribution.
+
+    With m ordered values the distance is sum_i |F(i) - G(i)| / (m - 1),
+    where F and G are the class and overall CDFs. F is constant between two
+    consecutive values of a class, so each such segment is summed in O(1)
+    from prefix sums of G, split where G crosses F (found by searchsorted).
+    """
+    m = len(global_prob)
+    n_classes = len(class_end)
+    if m < 2:
+        return np.zeros(n_classes)
+    cdf = np.cumsum(global_prob)
+    cdf[-1] = 1.0
+    prefix = np.concatenate([[0.0], np.cumsum(cdf)])
+
+    class_cdf = np.cumsum(pair_prob)
+    starts = np.concatenate([[0], class_end[:-1]])
+    # Remove the running total of earlier classes so every class starts at 0
+    class_cdf -= np.repeat(np.concatenate([[0.0], class_cdf[class_end[:-1] - 1]]), class_end - starts)
+
+    # Segment [pair_value, next value of the class or m) where F = class_cdf
+    seg_start = pair_value
+    seg_end = np.append(pair_value[1:], m)
+    last = np.zeros(len(pair_value), dtype=bool)
+    last[class_end - 1] = True
+    seg_end[last] = m
+
+    cross = np.clip(np.searchsorted(cdf, class_cdf, side='left'), seg_start, seg_end)
+    below = class_cdf * (cross - seg_start) - (prefix[cross] - prefix[seg_start])
+    above = (prefix[seg_end] - prefix[cross]) - class_cdf * (seg_end - cross)
+    totals = np.bincount(pair_class, weights=below + above, minlength=n_classes)
+
+    # Before its first value a class CDF is 0, contributing sum G over [0, first)
+    first_value = pair_value[starts]
+    totals[pair_class[starts]] += prefix[first_value]
+    return totals / (m - 1)
+
+
+def sensitive_attribute_metrics(index, series):
+    """Distinct l, entropy l and t-closeness of every class for one attribute.
+
+    ``index`` is the EquivalenceClassIndex of the data and ``series`` the
+    sensitive column. t-closeness is the ordered earth mover's distance for
+    numeric attributes and the variational distance for categorical ones.
+    Returns one row per class code; classes without any non-missing
+    sensitive value get l = 0 and t = NaN.
+    """
+    numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+    value_codes, n_values = _ranked_codes(series) if numeric else _column_codes(series)
+    n_classes = index.n_classes
+    pair_class, pair_value, counts = _pair_counts(index.class_codes, value_codes, max(n_values, 1))
+
+    class_totals = np.bincount(pair_class, weights=counts, minlength=n_classes)
+    distinct = np.bincount(pair_class, minlength=n_classes)
+    prob = counts / class_totals[pair_class]
+    entropy = -np.bincount(pair_class, weights=prob * np.log(prob), minlength=n_classes)
+
+    global_counts = np.bincount(pair_value, weights=counts, minlength=n_values)
+    global_prob = global_counts / global_counts.sum() if len(counts) else global_counts
+
+    t = np.full(n_classes, np.nan)
+    present = np.flatnonzero(distinct)
+    if len(present):
+        if numeric:
+            class_end = np.cumsum(distinct[present])
+            # Class codes of the pairs relabelled densely over present classes
+            dense_class = np.repeat(np.arange(len(present)), distinct[present])
+            t[present] = _ordered_emd(dense_class, pair_value, prob, class_end, global_prob)
+        else:
+            # 0.5 * (sum over present values |p - q| + mass of the absent values)
+            q = global_prob[pair_value]
+            t = 0.5 * (np.bincount(pair_class, weights=np.abs(prob - q), minlength=n_classes)
+                       + 1.0 - np.bincount(pair_class, weights=q, minlength=n_classes))
+            t[distinct == 0] = np.nan
+
+    return pd.DataFrame({
+        'size': index.group_sizes,
+        'distinct_l': distinct,
+        'entropy_l': np.where(distinct > 0, np.exp(entropy), 0.0),
+        't_closeness': t,
+        'measure': 'emd' if numeric else 'variational',
+    })
@@ -0,0 +1,295 @@
+import abc
+import itertools
+
+import numpy as np
+import pandas as pd
+
+SUPPRESSED = '*'
+
+
+class Hierarchy(abc.ABC):
+    """Generalization levels of one column.
+
+    Level 0 is the raw value, every level above it a coarser label of the
+    level below, and the top level ``'*'`` for every value. Subclasses
+    implement ``generalize(uniques, level)`` for the levels in between;
+    labels are computed once per distinct value, never per row, and values
+    a level cannot label (e.g. unparseable dates) become ``'*'``.
+    """
+
+    intermediate_levels = 0
+
+    @property
+    def height(self):
+        return self.intermediate_levels + 1
+
+    @abc.abstractmethod
+    def generalize(self, uniques, level):
+        """Label of every distinct value at an intermediate ``level``, None where it has none"""
+
+    def labels(self, uniques, level):
+        """Label of every distinct value at ``level``"""
+        if level == 0:
+            return np.asarray(uniques, dtype=object)
+        if level == self.height:
+            return np.full(len(uniques), SUPPRESSED, dtype=object)
+        labels = pd.Series(self.generalize(uniques, level), dtype=object)
+        return labels.where(labels.notna(), SUPPRESSED).to_numpy()
+
+
+class SuppressionHierarchy(Hierarchy):
+    """A column that can only be kept or suppressed: no level between raw and ``'*'``"""
+
+    def generalize(self, uniques, level):
+        raise ValueError("A suppression hierarchy has no intermediate levels")
+
+
+class IntervalHierarchy(Hierarchy):
+    """Numeric values bucketed into ranges of increasing width.
+
+    ``widths`` holds one bucket width per level, e.g. ``[5, 10, 20]``; each
+    width should be a multiple of the one before so that levels nest.
+    Integer columns get inclusive labels like ``20-29``, others half-open
+    ``20-30``.
+    """
+
+    def __init__(self, widths, origin=0):
+        self.widths = list(widths)
+        self.origin = origin
+        self.intermediate_levels = len(self.widths)
+
+    def generalize(self, uniques, level):
+        values = pd.to_numeric(pd.Series(uniques), errors='coerce').to_numpy(dtype=float)
+        width = self.widths[level - 1]
+        low = np.floor((values - self.origin) / width) * width + self.origin
+        finite = np.isfinite(values)
+        integral = np.all(np.mod(values[finite], 1) == 0) and float(width).is_integer()
+        high = low + width - 1 if integral else low + width
+        labels = np.full(len(values), None, dtype=object)
+        labels[finite] = [f"{lo:g}-{hi:g}" for lo, hi in zip(low[finite], high[finite])]
+        return labels
+
+
+class TreeHierarchy(Hierarchy):
+    """Categories mapped up a tree, one ``{child: parent}`` mapping per level.
+
+    Values missing from a level's mapping become ``'*'`` at that level.
+    """
+
+    def __init__(self, levels):
+        self.levels = [{str(child): str(parent) for child, parent in mapping.items()} for mapping in levels]
+        self.intermediate_levels = len(self.levels)
+
+    def generalize(self, uniques, level):
+        labels = pd.Series(uniques, dtype=object).astype(str)
+        for mapping in self.levels[:level]:
+            labels = labels.map(mapping).fillna(SUPPRESSED)
+        return labels.to_numpy()
+
+
+class DateHierarchy(Hierarchy):
+    """Dates truncated to coarser periods, one pandas frequency per level (e.g. ``["M", "Y"]``)"""
+
+    def __init__(self, levels):
+        self.levels = list(levels)
+        self.intermediate_levels = len(self.levels)
+
+    def generalize(self, uniques, level):
+        dates = pd.to_datetime(pd.Series(uniques), errors='coerce')
+        return dates.dt.to_period(self.levels[level - 1]).astype(str).where(dates.notna()).to_numpy()
+
+
+HIERARCHY_TYPES = {
+    'interval': lambda spec: IntervalHierarchy(spec['widths'], spec.get('origin', 0)),
+    'tree': lambda spec: TreeHierarchy(spec['levels']),
+    'date': lambda spec: DateHierarchy(spec['levels']),
+    'suppress': lambda spec: SuppressionHierarchy(),
+}
+
+
+def hierarchies_from_config(config, quasi_identifiers):
+    """Hierarchy of every QI; QIs without a configured one can only be kept or suppressed"""
+    specs = config['privacy']['k_anonymity'].get('hierarchies') or {}
+    hierarchies = {}
+    for qi in quasi_identifiers:
+        spec = specs.get(qi) or {'type': 'suppress'}
+        if spec['type'] not in HIERARCHY_TYPES:
+            raise ValueError(f"Unknown hierarchy type '{spec['type']}' for {qi}; "
+                             f"expected one of {', '.join(HIERARCHY_TYPES)}")
+        hierarchies[qi] = HIERARCHY_TYPES[spec['type']](spec)
+    return hierarchies
+
+
+class GeneralizationTable:
+    """Lookup arrays that generalize one column to any level with a single take.
+
+    The column is factorized once; for every level the table holds the
+    label and a dense label code of each distinct value, so generalizing
+    ``n`` rows is ``labels[level][codes]`` whatever the hierarchy.
+    """
+
+    def __init__(self, series, hierarchy):
+        self.hierarchy = hierarchy
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, uniques = pd.factorize(series)
+        self.codes = codes.astype(np.int64)
+        self.n_values = len(uniques)
+        self.labels = []
+        self.level_codes = []
+        self.level_sizes = []
+        self.spread = []
+        for level in range(hierarchy.height + 1):
+            labels = hierarchy.labels(uniques, level)
+            level_codes, level_uniques = pd.factorize(labels)
+            self.labels.append(labels)
+            self.level_codes.append(level_codes.astype(np.int64))
+            self.level_sizes.append(len(level_uniques))
+            # Share of the distinct values each value is merged with (0 raw, 1 suppressed)
+            merged = np.bincount(level_codes[level_codes >= 0], minlength=len(level_uniques))
+            self.spread.append((merged[np.maximum(level_codes, 0)] - 1) / max(self.n_values - 1, 1))
+
+    @property
+    def height(self):
+        return self.hierarchy.height
+
+    def column(self, level):
+        """The generalized values of every row"""
+        labels = np.append(self.labels[level], np.nan)
+        return labels[np.where(self.codes >= 0, self.codes, self.n_values)]
+
+
+def _combine(columns, cardinalities):
+    """Dense code of every row of several code arrays (mixed radix, re-densified before overflow)"""
+    key = np.zeros(len(columns[0]) if columns else 0, dtype=np.int64)
+    radix = 1
+    for codes, cardinality in zip(columns, cardinalities):
+        cardinality = max(cardinality, 1)
+        if radix * cardinality >= 2 ** 62:
+            key, uniques = pd.factorize(key)
+            radix = len(uniques)
+        key = key * cardinality + codes
+        radix *= cardinality
+    return pd.factorize(key)[0]
+
+
+def lattice_search(tables, k, suppression_limit=0.0):
+    """Full-domain generalization with the least information loss that is k-anonymous.
+
+    Every node of the lattice is one level per QI. Rows in classes smaller
+    than k are suppressed when they are at most ``suppression_limit`` of
+    the rows. Nodes are visited by increasing total level. Above a node
+    that satisfies k without suppressing anything, every node does too,
+    with at least its loss, so those nodes are never evaluated; above a
+    node that suppresses records a coarser node can suppress fewer and lose
+    less, so the search goes on there. Each node is evaluated on the distinct
+    QI tuples with their counts, not on the rows. Records with a missing QI
+    belong to no class, as in the risk assessment.
+
+    Returns the chosen levels, the achieved k, the number of classes and
+    suppressed records, the information loss (mean over QIs of the share
+    of distinct values merged, suppressed records counting as 1) and the
+    number of nodes evaluated.
+    """
+    tables = list(tables)
+    valid = np.ones(len(tables[0].codes), dtype=bool)
+    for table in tables:
+        valid &= table.codes >= 0
+    tuple_ids = _combine([table.codes[valid] for table in tables], [table.n_values for table in tables])
+    first = np.unique(tuple_ids, return_index=True)[1]
+    tuple_counts = np.bincount(tuple_ids)
+    tuple_codes = [table.codes[valid][first] for table in tables]
+    n_rows = int(valid.sum())
+    allowed = suppression_limit * n_rows
+
+    def evaluate(node):
+        classes = _combine([table.level_codes[level][codes] for table, level, codes in zip(tables, node, tuple_codes)],
+                           [table.level_sizes[level] for table, level in zip(tables, node)])
+        sizes = np.bincount(classes, weights=tuple_counts).astype(np.int64)
+        small = sizes[classes] < k
+        suppressed = int(tuple_counts[small].sum())
+        kept = ~small
+        loss = np.mean([(np.dot(tuple_counts[kept], table.spread[level][codes][kept]) + suppressed)
+                        / max(n_rows, 1) for table, level, codes in zip(tables, node, tuple_codes)])
+        achieved = int(sizes[sizes >= k].min()) if (sizes >= k).any() else int(sizes.max(initial=0))
+        return {
+            'satisfied': n_rows == 0 or (suppressed <= allowed and (sizes >= k).any()),
+            'levels': tuple(node),
+            'achieved_k': achieved,
+            'classes': int((sizes >= k).sum()),
+            'suppressed': suppressed,
+            'suppressed_tuples': small,
+            'information_loss': float(loss),
+        }
+
+    nodes = sorted(itertools.product(*[range(table.height + 1) for table in tables]), key=sum)
+    satisfied = []
+    evaluated = 0
+    for node in nodes:
+        if any(best['suppressed'] == 0 and all(a >= b for a, b in zip(node, best['levels']))
+               for best in satisfied):
+            continue
+        result = evaluate(node)
+        evaluated += 1
+        if result['satisfied']:
+            satisfied.append(result)
+
+    if satisfied:
+        best = min(satisfied, key=lambda result: result['information_loss'])
+    else:
+        # Not even full suppression of the QIs reaches k (fewer than k rows)
+        best = evaluate(nodes[-1])
+        best.update(achieved_k=n_rows, classes=1, suppressed=0)
+        best['suppressed_tuples'][:] = False
+    best['nodes_evaluated'] = evaluated
+    # Per-row suppression flags of the valid rows
+    best['suppressed_rows'] = best.pop('suppressed_tuples')[tuple_ids]
+    best['valid_rows'] = valid
+    return best
+
+
+def hierarchy_generalize(data, quasi_identifiers, k, hierarchies, suppression_limit=0.0):
+    """Generalize ``quasi_identifiers`` to the best k-anonymous node of their hierarchies.
+
+    Every QI is recoded to the same level across all rows (full-domain
+    generalization). Records still in a class smaller than k are
+    suppressed by setting their QIs to missing. Returns the generalized
+    frame and a summary like ``mondrian_generalize``'s, plus the chosen
+    ``levels``, the number of ``suppressed`` records and the number of
+    lattice nodes evaluated.
+    """
+    result = data.copy()
+    if len(data) == 0 or not quasi_identifiers:
+        return result, {
+            'k': k,
+            'achieved_k': len(data),
+            'partitions': int(len(data) > 0),
+            'information_loss': 0.0,
+            'quasi_identifiers': list(quasi_identifiers),
+            'levels': {},
+            'suppressed': 0,
+        }
+
+    tables = [GeneralizationTable(data[qi], hierarchies[qi]) for qi in quasi_identifiers]
+    best = lattice_search(tables, k, suppression_limit)
+
+    suppressed = np.zeros(len(data), dtype=bool)
+    suppressed[np.flatnonzero(best['valid_rows'])[best['suppressed_rows']]] = True
+    for qi, table, level in zip(quasi_identifiers, tables, best['levels']):
+        if level > 0:
+            result[qi] = table.column(level)
+        if suppressed.any():
+            result[qi] = result[qi].astype(object).where(~suppressed)
+
+    summary = {
+        'k': k,
+        'achieved_k': best['achieved_k'],
+        'partitions': best['classes'],
+        'information_loss': best['information_loss'],
+        'quasi_identifiers': list(quasi_identifiers),
+        'levels': dict(zip(quasi_identifiers, best['levels'])),
+        'suppressed': best['suppressed'],
+        'nodes_evaluated': best['nodes_evaluated'],
+    }
+    return result, summary
@@ -0,0 +1,245 @@
+import os
+import pickle
+import tempfile
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from src.risk_assessment import RiskAssessor
+from src.privacy_enhancement import PrivacyEnhancer
+from src.data_io import read_table, TableWriter
+from src.sketches import RunningStats, CountTable
+from src.profiling import stage
+
+
+def _class_key(key):
+    """Hashable QI tuple with missing values as None, whatever the dtypes"""
+    key = key if isinstance(key, tuple) else (key,)
+    return tuple(None if pd.isna(value) else value for value in key)
+
+
+class IncrementalState:
+    """Everything the risk metrics and the release need from past records.
+
+    ``group_counts`` maps each QI tuple to its number of records and
+    ``size_histogram`` maps each class size to its number of classes, so the
+    smallest class is found without visiting every class. ``distributions``
+    holds the value counts of every categorical sensitive attribute and
+    ``moments`` the running moments of every numeric column. ``epsilon`` is
+    the largest epsilon charged for the release so far and ``epsilon_spent``
+    what those charges added to the budget. ``pending`` holds the records
+    of deltas too small to release on their own (fewer than k).
+    """
+
+    VERSION = 2
+
+    def __init__(self, quasi_identifiers):
+        self.version = self.VERSION
+        self.quasi_identifiers = list(quasi_identifiers)
+        self.rows = 0
+        self.batches = 0
+        self.group_counts = Counter()
+        self.size_histogram = Counter()
+        self.distributions = {}
+        self.moments = {}
+        self.epsilon = 0.0
+        self.epsilon_spent = 0.0
+        self.pending = None
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if getattr(state, 'version', None) != cls.VERSION:
+            raise ValueError(f"Incompatible incremental state in {path}; remove it to rebuild")
+        return state
+
+    def save(self, path):
+        # Write to a temporary file first so an interrupted save keeps the old state
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def update_groups(self, delta):
+        """Add the QI classes of ``delta``; returns the new size of each delta row's class"""
+        available_qi = [qi for qi in self.quasi_identifiers if qi in delta.columns]
+        if not available_qi:
+            return None
+        grouped = delta.groupby(available_qi, observed=True, dropna=False, sort=True)
+        counts = grouped.size()
+        totals = np.empty(len(counts), dtype=np.int64)
+        # One step per class touched by the delta, not per class seen so far
+        for i, (key, count) in enumerate(counts.items()):
+            key = _class_key(key)
+            old = self.group_counts[key]
+            if old:
+                self.size_histogram[old] -= 1
+                if not self.size_histogram[old]:
+                    del self.size_histogram[old]
+            new = totals[i] = old + int(count)
+            self.group_counts[key] = new
+            self.size_histogram[new] += 1
+        return pd.Series(totals[grouped.ngroup().to_numpy()], index=delta.index)
+
+    def update_distributions(self, delta, attributes):
+        # Numeric attributes are summarized by their moments instead
+        for attr in attributes:
+            if attr in delta.columns and not pd.api.types.is_numeric_dtype(delta[attr]):
+                counts = delta[attr].value_counts(dropna=False)
+                self.distributions.setdefault(attr, Counter()).update(
+                    {CountTable.MISSING if pd.isna(value) else value: int(count) for value, count in counts.items()})
+
+    def update_moments(self, delta):
+        for col in delta.select_dtypes(include=[np.number]).columns:
+            if col != 'id':
+                self.moments.setdefault(col, RunningStats()).update(delta[col])
+
+    @property
+    def min_class_size(self):
+        return min(self.size_histogram) if self.size_histogram else 0
+
+    def classes_below(self, k):
+        return sum(classes for size, classes in self.size_histogram.items() if size < k)
+
+
+class IncrementalPipeline:
+    """Ingest new records into a persisted state instead of reprocessing history.
+
+    Each delta file updates the QI class counts, sensitive-attribute
+    distributions and column moments in the state file, recomputes
+    k-anonymity, prosecutor and journalist risk from them, and appends its
+    protected rows to the (CSV) output file, all in time proportional to the
+    delta. The first ingest, when no state file exists yet, starts a new
+    output file.
+
+    Deltas are generalized on their own, so every class of a delta's
+    release has at least k records when the delta does; a delta with fewer
+    than k records is held back in the state and released with the next
+    ones. The achieved k of each release is reported. Deltas hold
+    disjoint records, so together they form one release under parallel
+    composition: the budget is charged on the first ingest, and again only
+    if the configured epsilon grows. Each delta draws noise from its own
+    stream, scaled by the configured ``bounds`` or ``sensitivity``, which
+    every noised column needs: future deltas' ranges are unknown. Synthetic data needs the whole history and is not generated.
+    Records left in a class smaller than k after the ingest are flagged.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        settings = config.get('incremental') or {}
+        self.state_file = settings.get('state_file', 'data/incremental_state.pkl')
+        self.flagged_file = settings.get('flagged_file')
+        self.k_value = config['privacy']['k_anonymity']['k_value']
+
+    def load_state(self):
+        if os.path.exists(self.state_file):
+            return IncrementalState.load(self.state_file)
+        return IncrementalState(self.config['risk_settings']['quasi_identifiers'])
+
+    def unscaled_columns(self, delta):
+        """Numeric columns the DP step would noise without a configured bounds or sensitivity"""
+        privacy = self.config['privacy']
+        settings = privacy['differential_privacy']
+        if not settings['enabled']:
+            return []
+        scaled = set(settings.get('bounds') or {}) | set(settings.get('sensitivity') or {}) | {'id'}
+        if privacy['k_anonymity']['enabled']:
+            # Generalized QIs are released without noise
+            scaled |= set(self.config['risk_settings']['quasi_identifiers'])
+        return [col for col in delta.select_dtypes(include=[np.number]).columns if col not in scaled]
+
+    def protect(self, enhancer, state, delta):
+        """Generalize and noise one delta, charging the budget only for a larger epsilon"""
+        privacy = self.config['privacy']
+        result = delta
+        generalized = []
+        if privacy['k_anonymity']['enabled']:
+            result = enhancer.apply_k_anonymity(result, self.k_value)
+            generalized = enhancer.k_anonymity_summary['quasi_identifiers']
+        if privacy['differential_privacy']['enabled']:
+            epsilon = privacy['differential_privacy']['epsilon']
+            charge = epsilon > state.epsilon
+            spent = enhancer.accountant.spent
+            result = enhancer.apply_differential_privacy(result, epsilon, stream=state.batches,
+                                                         charge=charge, inplace=result is not delta,
+                                                         exclude=generalized, ranges={})
+            if charge:
+                state.epsilon = epsilon
+                state.epsilon_spent += enhancer.accountant.spent - spent
+        return result
+
+    def risk_report(self, state):
+        """k-anonymity, prosecutor and journalist risk of every record ingested so far"""
+        assessor = RiskAssessor(self.config)
+        if not state.group_counts:
+            k_anonymity = (float('inf'), "No quasi-identifiers found")
+        else:
+            k_value = state.min_class_size
+            k_anonymity = (k_value, f"Minimum group size: {k_value}, "
+                                    f"Risky groups: {state.classes_below(self.k_value)}")
+        return {
+            'k_anonymity': k_anonymity,
+            'prosecutor_risk': assessor.assess_prosecutor_risk(k_anonymity[0]),
+            'journalist_risk': assessor.assess_journalist_risk(k_anonymity[0], state.rows),
+        }
+
+    @stage
+    def ingest(self, delta_file):
+        """Add the records of ``delta_file`` and return the updated report"""
+        settings = self.config['data_settings']
+        delta = read_table(delta_file, dtypes=settings.get('dtypes'),
+                           memory_map=settings.get('memory_map', True))
+        unscaled = self.unscaled_columns(delta)
+        if unscaled:
+            raise ValueError(f"No differential_privacy bounds or sensitivity for {', '.join(unscaled)}; "
+                             f"incremental releases need them, since later deltas' ranges are unknown")
+        state = self.load_state()
+
+        class_sizes = state.update_groups(delta)
+        state.update_distributions(delta, self.config['risk_settings'].get('sensitive_attributes', []))
+        state.update_moments(delta)
+        state.rows += len(delta)
+
+        # Records of earlier deltas too small to release go out with this one
+        batch = delta if state.pending is None else pd.concat([state.pending, delta], ignore_index=True)
+        release = {'rows': 0, 'achieved_k': None, 'held_back': 0}
+        if self.config['privacy']['k_anonymity']['enabled'] and len(batch) < self.k_value:
+            state.pending = batch
+            release['held_back'] = len(batch)
+        else:
+            enhancer = PrivacyEnhancer(self.config)
+            protected = self.protect(enhancer, state, batch)
+            with TableWriter(settings['output_file'], settings.get('output_format'),
+                             append=state.batches > 0) as writer:
+                writer.write(protected)
+            state.pending = None
+            state.batches += 1
+            release['rows'] = len(protected)
+            if hasattr(enhancer, 'k_anonymity_summary'):
+                release['achieved_k'] = enhancer.k_anonymity_summary['achieved_k']
+        state.save(self.state_file)
+
+        flagged = delta.iloc[0:0]
+        if class_sizes is not None:
+            flagged = delta[class_sizes < self.k_value].assign(class_size=class_sizes)
+        if self.flagged_file:
+            flagged.to_csv(self.flagged_file, index=False)
+
+        report = self.risk_report(state)
+        report.update({
+            'records': state.rows,
+            'delta_records': len(delta),
+            'flagged_records': (len(flagged), f"{len(flagged)} new records in classes smaller than k={self.k_value}"),
+            'release': release,
+            'epsilon_spent': state.epsilon_spent,
+            'distributions': {attr: {str(value): count for value, count in counts.items()}
+                              for attr, counts in state.distributions.items()},
+            'moments': {col: {'count': stats.count, 'mean': stats.mean, 'std': np.sqrt(stats.variance)}
+                        for col, stats in state.moments.items()},
+        })
+        self.flagged = flagged
+        return report
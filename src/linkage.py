@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+
+
+class LinkageEngine:
+    """Vectorized record linkage between a released dataset and auxiliary data.
+
+    Both sides are collapsed into equivalence classes (distinct join-key tuples
+    with their counts) before joining, so the work is one groupby per side plus
+    a hash join over distinct classes instead of a comparison of every pair of
+    rows. The auxiliary side can be collapsed once and reused for many frames.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        settings = config['risk_settings'].get('linkage') or {}
+        self.join_keys = settings.get('join_keys', ['id'])
+        self.mode = settings.get('mode', 'exact')
+        self.tolerances = settings.get('tolerances') or {}
+        self.chunk_size = settings.get('chunk_size', 100000)
+
+    def _equivalence_classes(self, frame, keys, count_name):
+        """Collapse records into distinct key tuples with their counts"""
+        return (frame.groupby(keys, observed=True, sort=False)
+                .size()
+                .rename(count_name)
+                .reset_index())
+
+    def _exact_candidates(self, targets, auxiliary, keys):
+        """Hash join on the full key tuple"""
+        joined = targets.merge(auxiliary, on=keys, how='left')
+        return joined['candidates'].fillna(0).to_numpy()
+
+    def _block_codes(self, targets, auxiliary, block_keys):
+        """Assign shared integer codes to the blocking-key tuples of both sides"""
+        if not block_keys:
+            return np.zeros(len(targets), dtype=np.int64), np.zeros(len(auxiliary), dtype=np.int64), 1
+        combined = pd.concat([targets[block_keys], auxiliary[block_keys]], ignore_index=True)
+        grouper = combined.groupby(block_keys, observed=True, sort=False)
+        codes = grouper.ngroup().to_numpy()
+        return codes[:len(targets)], codes[len(targets):], grouper.ngroups
+
+    def _window_candidates(self, targets, auxiliary, block_keys, key):
+        """Count candidates within a single tolerance window per block.
+
+        Auxiliary classes are sorted by (block, value) once; the candidate
+        count of every target class is then a difference of two cumulative
+        counts found with ``searchsorted``, so no candidate pairs are built.
+        """
+        tolerance = self.tolerances[key]
+        target_codes, aux_codes, n_blocks = self._block_codes(targets, auxiliary, block_keys)
+        aux_values = auxiliary[key].to_numpy(dtype=float)
+        target_values = targets[key].to_numpy(dtype=float)
+
+        order = np.lexsort((aux_values, aux_codes))
+        aux_codes = aux_codes[order]
+        aux_values = aux_values[order]
+        cumulative = np.concatenate([[0], np.cumsum(auxiliary['candidates'].to_numpy()[order])])
+        aux_bounds = np.searchsorted(aux_codes, np.arange(n_blocks + 1))
+
+        target_order = np.argsort(target_codes, kind='stable')
+        target_bounds = np.searchsorted(target_codes[target_order], np.arange(n_blocks + 1))
+
+        counts = np.zeros(len(targets))
+        for block in range(n_blocks):
+            start, end = aux_bounds[block], aux_bounds[block + 1]
+            members = target_order[target_bounds[block]:target_bounds[block + 1]]
+            if start == end or len(members) == 0:
+                continue
+            values = aux_values[start:end]
+            lower = np.searchsorted(values, target_values[members] - tolerance, side='left') + start
+            upper = np.searchsorted(values, target_values[members] + tolerance, side='right') + start
+            counts[members] = cumulative[upper] - cumulative[lower]
+        return counts
+
+    def _bucket_candidates(self, targets, auxiliary, block_keys, window_keys):
+        """Count candidates within several tolerance windows via bucketed joins.
+
+        Numeric values are bucketed by their tolerance so that every match
+        lies in the same or an adjacent bucket; each target class is probed
+        against three buckets per windowed key and the surviving pairs are
+        filtered on the true distance. Target classes are processed in chunks
+        so the candidate pairs held in memory stay bounded.
+        """
+        auxiliary = auxiliary.rename(columns={key: f"{key}_aux" for key in window_keys})
+        bucket_cols = [f"_bucket_{key}" for key in window_keys]
+        for key, bucket in zip(window_keys, bucket_cols):
+            auxiliary[bucket] = np.floor(auxiliary[f"{key}_aux"].to_numpy(dtype=float) / self.tolerances[key])
+
+        counts = np.zeros(len(targets))
+        for start in range(0, len(targets), self.chunk_size):
+            chunk = targets.iloc[start:start + self.chunk_size]
+            probes = chunk.assign(_class=np.arange(len(chunk)))
+            for key, bucket in zip(window_keys, bucket_cols):
+                base = np.floor(probes[key].to_numpy(dtype=float) / self.tolerances[key])
+                probes = pd.concat(
+                    [probes.assign(**{bucket: base + offset}) for offset in (-1, 0, 1)],
+                    ignore_index=True,
+                )
+
+            pairs = probes.merge(auxiliary, on=block_keys + bucket_cols, how='inner')
+            within = np.ones(len(pairs), dtype=bool)
+            for key in window_keys:
+                distance = np.abs(pairs[key].to_numpy(dtype=float) - pairs[f"{key}_aux"].to_numpy(dtype=float))
+                within &= distance <= self.tolerances[key]
+
+            counts[start:start + len(chunk)] = np.bincount(
+                pairs['_class'].to_numpy()[within],
+                weights=pairs['candidates'].to_numpy(dtype=float)[within],
+                minlength=len(chunk),
+            )
+        return counts
+
+    def _approximate_candidates(self, targets, auxiliary, keys):
+        """Blocked join with tolerance windows on numeric keys.
+
+        Keys listed in ``tolerances`` are matched within +/- tolerance, all
+        other keys act as exact blocking keys.
+        """
+        window_keys = [key for key in keys if self.tolerances.get(key, 0) > 0]
+        block_keys = [key for key in keys if key not in window_keys]
+        if not window_keys:
+            return self._exact_candidates(targets, auxiliary, keys)
+        if len(window_keys) == 1:
+            return self._window_candidates(targets, auxiliary, block_keys, window_keys[0])
+        return self._bucket_candidates(targets, auxiliary, block_keys, window_keys)
+
+    def auxiliary_classes(self, auxiliary, keys):
+        """Candidate counts per distinct ``keys`` tuple of the auxiliary data.
+
+        ``auxiliary`` is a frame or an iterable of frames (e.g. chunks of a
+        file); each chunk is collapsed on its own and only its classes are
+        kept, so the rows are never held together. Pass the result to
+        ``link`` to probe many frames against it without collapsing the
+        auxiliary data again.
+        """
+        frames = [auxiliary] if isinstance(auxiliary, pd.DataFrame) else auxiliary
+        parts = [self._equivalence_classes(frame, keys, 'candidates') for frame in frames]
+        if len(parts) == 1:
+            return parts[0]
+        combined = pd.concat(parts, ignore_index=True)
+        return combined.groupby(keys, observed=True, sort=False)['candidates'].sum().reset_index()
+
+    def link(self, data, auxiliary=None, candidates=None):
+        """Link ``data`` against ``auxiliary`` on the configured join keys.
+
+        ``candidates``, the ``auxiliary_classes`` of the auxiliary data, can
+        be given instead of ``auxiliary``; ``data`` is then linked on the
+        keys they were built on. Returns a dict with the number of linked
+        records, the success rate and a per-equivalence-class frame holding
+        the number of auxiliary candidates and the resulting
+        re-identification probability, or None when the two frames share no
+        join key.
+        """
+        if candidates is None:
+            keys = [key for key in self.join_keys if key in data.columns and key in auxiliary.columns]
+            if not keys:
+                return None
+            candidates = self.auxiliary_classes(auxiliary, keys)
+        else:
+            keys = [key for key in candidates.columns if key != 'candidates']
+            missing = [key for key in keys if key not in data.columns]
+            if missing:
+                raise ValueError(f"Join keys missing from the data: {', '.join(missing)}")
+
+        targets = self._equivalence_classes(data, keys, 'size')
+
+        if self.mode == 'approximate':
+            counts = self._approximate_candidates(targets, candidates, keys)
+        else:
+            counts = self._exact_candidates(targets, candidates, keys)
+
+        targets['candidates'] = counts.astype(np.int64)
+        with np.errstate(divide='ignore'):
+            targets['reidentification_probability'] = np.where(counts > 0, 1.0 / counts, 0.0)
+
+        total = len(data)
+        sizes = targets['size'].to_numpy()
+        matches = int(sizes[counts > 0].sum())
+        success_rate = (matches / total) * 100 if total > 0 else 0
+
+        return {
+            'join_keys': keys,
+            'mode': self.mode,
+            'matches': matches,
+            'total': total,
+            'success_rate': success_rate,
+            'expected_reidentifications': float((sizes * targets['reidentification_probability']).sum()),
+            'classes': targets,
+        }
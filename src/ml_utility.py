@@ -0,0 +1,119 @@
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold, cross_validate, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+MODELS = {
+    'logistic_regression': lambda seed: LogisticRegression(max_iter=1000, random_state=seed),
+    'random_forest': lambda seed: RandomForestClassifier(n_estimators=100, min_samples_leaf=5, random_state=seed),
+    'hist_gradient_boosting': lambda seed: HistGradientBoostingClassifier(random_state=seed),
+}
+
+
+def _is_numeric(column):
+    return pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column)
+
+
+def feature_columns(data, target, config, protected=None):
+    """Numeric columns plus the non-numeric QIs and sensitive attributes
+
+    A column is numeric only if it is numeric in ``protected`` as well, so a
+    QI the protection turned into range labels is one-hot encoded rather
+    than parsed into missing values.
+    """
+    risk = config['risk_settings']
+    candidates = set(risk['quasi_identifiers']) | set(risk.get('sensitive_attributes', []))
+    numeric, categorical = [], []
+    for col in data.columns:
+        if col in ('id', target):
+            continue
+        if _is_numeric(data[col]):
+            if protected is None or col not in protected.columns or _is_numeric(protected[col]):
+                numeric.append(col)
+            else:
+                categorical.append(col)
+        elif col in candidates:
+            categorical.append(col)
+    return numeric, categorical
+
+
+def make_target(data, target, rule):
+    """Labels for ``target``: above/below the frame's median, or the raw classes"""
+    column = data[target]
+    if rule == 'median':
+        column = pd.to_numeric(column, errors='coerce')
+        labels = (column > column.median()).astype(int)
+        return labels.where(column.notna())
+    return column.astype(object).where(column.notna())
+
+
+def make_features(data, numeric, categorical):
+    """Feature frame with a stable type per column, whatever the privacy technique did"""
+    columns = {col: pd.to_numeric(data[col], errors='coerce') if col in data.columns
+               else np.nan for col in numeric}
+    columns.update({col: data[col].astype(object).where(data[col].notna(), 'missing').astype(str)
+                    if col in data.columns else 'missing' for col in categorical})
+    return pd.DataFrame(columns, index=data.index)
+
+
+def build_pipeline(model, numeric, categorical, max_categories=20, seed=42):
+    preprocess = ColumnTransformer([
+        ('numeric', Pipeline([('impute', SimpleImputer(strategy='median')),
+                              ('scale', StandardScaler())]), numeric),
+        ('categorical', OneHotEncoder(handle_unknown='infrequent_if_exist', max_categories=max_categories,
+                                      sparse_output=False), categorical),
+    ])
+    return Pipeline([('preprocess', preprocess), ('model', MODELS[model](seed))])
+
+
+def subsample(labels, max_rows, seed=42):
+    """Stratified sample of at most ``max_rows`` labels (uniform if stratifying fails)"""
+    if not max_rows or len(labels) <= max_rows:
+        return labels
+    try:
+        sample, _ = train_test_split(labels, train_size=max_rows, stratify=labels, random_state=seed)
+    except ValueError:
+        sample, _ = train_test_split(labels, train_size=max_rows, random_state=seed)
+    return sample
+
+
+def labelled(data, target, rule, numeric, categorical, max_rows, seed):
+    """Features and labels of a subsample of the rows with a known target"""
+    labels = make_target(data, target, rule).dropna()
+    if rule == 'median':
+        labels = labels.astype(int)
+    # Sample first so features are only built for the rows that are used
+    labels = subsample(labels, max_rows, seed)
+    return make_features(data.loc[labels.index], numeric, categorical), labels
+
+
+def evaluate(pipeline, features, labels, folds, n_jobs=1, seed=42):
+    """Stratified k-fold accuracy and fit time of one pipeline, or None if too few rows"""
+    class_counts = labels.value_counts()
+    splits = min(folds, class_counts.min()) if len(class_counts) > 1 else 0
+    if splits < 2:
+        return None
+    scores = cross_validate(pipeline, features, labels, scoring='accuracy', n_jobs=n_jobs,
+                            cv=StratifiedKFold(n_splits=splits, shuffle=True, random_state=seed))
+    return {
+        'accuracy': float(np.mean(scores['test_score'])),
+        'accuracy_std': float(np.std(scores['test_score'])),
+        'fit_time': float(np.sum(scores['fit_time'])),
+        'rows': len(features),
+        'folds': splits,
+    }
+
+
+def train_and_test(pipeline, train_features, train_labels, test_features, test_labels):
+    """Accuracy of a pipeline fitted on one dataset and scored on another (TSTR)"""
+    start = time.perf_counter()
+    pipeline.fit(train_features, train_labels)
+    fit_time = time.perf_counter() - start
+    return {'accuracy': float(pipeline.score(test_features, test_labels)), 'fit_time': fit_time}
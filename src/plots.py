@@ -0,0 +1,187 @@
+import hashlib
+import io
+import json
+import re
+import threading
+
+import numpy as np
+
+from src.scheduler import TaskScheduler
+
+# Text stays text instead of one path per glyph, which keeps each SVG small
+SVG_SETTINGS = {'svg.fonttype': 'none'}
+# rcParams is process-wide, so threads take turns inside the rc_context
+_RENDER_LOCK = threading.Lock()
+
+
+def numeric_histogram(column, original, protected, bins=30):
+    """Binned fractions of one numeric column, from two dataset sketches.
+
+    Both distributions share ``bins`` equal-width bins over the combined
+    range, and the fraction in each bin is read off the KLL CDF, so no row
+    is touched. Returns None when either side has no values.
+    """
+    stats = (original.stats[column], protected.stats[column])
+    if any(s.count == 0 for s in stats):
+        return None
+    low = min(s.minimum for s in stats)
+    high = max(s.maximum for s in stats)
+    if high <= low:
+        low, high = low - 0.5, high + 0.5
+    edges = np.linspace(low, high, bins + 1)
+
+    def fractions(sketch):
+        cdf = sketch.quantiles[column].cdf(edges)
+        # The lowest value belongs to the first bin
+        cdf[0] = 0.0
+        cdf[-1] = 1.0
+        return np.diff(cdf)
+
+    return {
+        'column': column,
+        'kind': 'numeric',
+        'edges': edges.tolist(),
+        'original': fractions(original).tolist(),
+        'protected': fractions(protected).tolist(),
+    }
+
+
+def categorical_histogram(column, original, protected, max_bars=20):
+    """Fractions of the most frequent original categories, the rest pooled as 'other'"""
+    orig = original.counts[column].distribution()
+    prot = protected.counts[column].distribution()
+    if orig.empty and prot.empty:
+        return None
+    labels = orig.sort_values(ascending=False).index[:max_bars].tolist()
+    # Categories only the protected data has are pooled too
+    orig_values = [float(orig.get(label, 0.0)) for label in labels]
+    prot_values = [float(prot.get(label, 0.0)) for label in labels]
+    if len(orig) > len(labels) or not prot.index.isin(labels).all():
+        labels.append('other')
+        orig_values.append(max(1.0 - sum(orig_values), 0.0))
+        prot_values.append(max(1.0 - sum(prot_values), 0.0))
+    return {
+        'column': column,
+        'kind': 'categorical',
+        'labels': [str(label) for label in labels],
+        'original': orig_values,
+        'protected': prot_values,
+    }
+
+
+def comparison_histograms(original, protected, bins=30, max_bars=20):
+    """Histograms of every column two dataset sketches share, by column"""
+    histograms = {}
+    for column in original.numeric:
+        histograms[column] = numeric_histogram(column, original, protected, bins)
+    for column in original.categorical:
+        histograms[column] = categorical_histogram(column, original, protected, max_bars)
+    return {column: hist for column, hist in histograms.items() if hist is not None}
+
+
+def _round_coordinates(match):
+    # Tenths of a point are below what a screen shows
+    value = re.sub(r'(\d+\.\d)\d+', r'\1', match.group(2))
+    return f' {match.group(1)}="' + ' '.join(value.split()) + '"'
+
+
+def compact_svg(svg):
+    """Smaller equivalent SVG for embedding many plots in one page.
+
+    Drops the metadata block, indentation and no-op text rotations, rounds
+    coordinates to 0.1pt and shortens the font fallback list.
+    """
+    svg = re.sub(r'<metadata>.*?</metadata>', '', svg, flags=re.S)
+    svg = re.sub(r'>\s+<', '><', svg)
+    svg = re.sub(r' transform="rotate\(-0 [^"]*\)"', '', svg)
+    svg = re.sub(r"font-family: [^;\"]*", "font-family: 'DejaVu Sans', sans-serif", svg)
+    return re.sub(r' (d|x|y|width|height|transform)="([^"]*)"', _round_coordinates, svg)
+
+
+def plot_key(histogram, width, height):
+    """Content hash of a plot: its histogram data and figure size"""
+    content = json.dumps({'histogram': histogram, 'size': [width, height]}, sort_keys=True)
+    return f"plot-{hashlib.sha1(content.encode()).hexdigest()}"
+
+
+def render_svg(histogram, width=4.0, height=2.6):
+    """Render one comparison histogram as an inline SVG element.
+
+    Uses a standalone Figure rather than pyplot, so no figure state is
+    shared. The SVG settings are process-wide rcParams, so renders in one
+    process hold a lock from the ``rc_context`` to the saved SVG; plots only
+    render in parallel under the process executor.
+    """
+    import matplotlib
+    from matplotlib.figure import Figure
+
+    with _RENDER_LOCK, matplotlib.rc_context(SVG_SETTINGS):
+        fig = Figure(figsize=(width, height))
+        ax = fig.add_subplot()
+        if histogram['kind'] == 'numeric':
+            edges = histogram['edges']
+            ax.stairs(histogram['original'], edges, fill=True, alpha=0.5, label='Original')
+            ax.stairs(histogram['protected'], edges, fill=True, alpha=0.5, label='Protected')
+            bottom = 0.12
+        else:
+            positions = np.arange(len(histogram['labels']))
+            ax.bar(positions - 0.2, histogram['original'], width=0.4, alpha=0.7, label='Original')
+            ax.bar(positions + 0.2, histogram['protected'], width=0.4, alpha=0.7, label='Protected')
+            labels = [label if len(label) <= 12 else label[:11] + '\u2026' for label in histogram['labels']]
+            ax.set_xticks(positions, labels, rotation=45, ha='right', fontsize=7)
+            bottom = 0.3
+        ax.set_title(f"{histogram['column']} distribution", fontsize=9)
+        ax.set_ylabel('fraction', fontsize=8)
+        ax.locator_params(axis='y', nbins=5)
+        ax.tick_params(labelsize=7)
+        ax.legend(fontsize=7)
+        # Fixed margins: tight_layout would lay the text out once more per plot
+        fig.subplots_adjust(left=0.16, right=0.97, top=0.9, bottom=bottom)
+
+        buffer = io.StringIO()
+        fig.savefig(buffer, format='svg', metadata={'Date': None})
+    svg = buffer.getvalue()
+    # Drop the XML prolog so the element can be embedded in HTML
+    return compact_svg(svg[svg.index('<svg'):].strip())
+
+
+class PlotRenderer:
+    """Render comparison histograms to SVG, in parallel and cached by content.
+
+    Each plot is keyed by a hash of its histogram data, so a plot whose
+    data did not change is read from the artifact cache (or the renderer's
+    own memo when the cache is disabled) instead of being drawn again.
+    Missing plots are rendered as independent TaskScheduler tasks; drawing
+    holds the GIL, so they only render on several cores with the process
+    executor.
+    """
+
+    def __init__(self, config, cache=None):
+        self.config = config
+        self.cache = cache
+        settings = config.get('output') or {}
+        self.width = settings.get('plot_width', 4.0)
+        self.height = settings.get('plot_height', 2.6)
+        self._rendered = {}
+
+    def render(self, histograms):
+        """SVG of every histogram, by column"""
+        keys = {column: plot_key(hist, self.width, self.height) for column, hist in histograms.items()}
+        svgs = {}
+        for column, key in keys.items():
+            svg = self._rendered.get(key)
+            if svg is None and self.cache is not None:
+                svg = self.cache.get(key)
+            if svg is not None:
+                svgs[column] = self._rendered[key] = svg
+
+        scheduler = TaskScheduler(self.config)
+        tasks = {column: scheduler.add(f"plot:{column}", render_svg, histograms[column], self.width, self.height)
+                 for column in histograms if column not in svgs}
+        if tasks:
+            outputs = scheduler.run()
+            for column, task in tasks.items():
+                svgs[column] = self._rendered[keys[column]] = outputs[task.name]
+                if self.cache is not None:
+                    self.cache.put(keys[column], outputs[task.name])
+        return {column: svgs[column] for column in histograms}
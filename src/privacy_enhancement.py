@@ -1,178 +1,172 @@
-import pandas as pd
 import numpy as np
-from sklearn.preprocessing import LabelEncoder
 
-class PrivacyEnhancer:
-    def __init__(self, config):
-        self.config = config
-        
-    def apply_k_anonymity(self, data, k=5):
-        """Apply k-anonymity by generalization"""
-        result = data.copy()
-        quasi_identifiers = self.config['risk_settings']['quasi_identifiers']
-        
-        # Age generalization
-        if 'age' in result.columns:
-            result['age'] = (result['age'] // 10) * 10  # Round to nearest 10
-        
-        # Location generalization  
-        if 'location' in result.columns:
-            # Keep only major cities, group others as "Other"
-            major_cities = ['Mumbai', 'Delhi', 'Bangalore', 'Chennai']
-            result['location'] = result['location'].apply(
-                lambda x: x if x in major_cities else 'Other'
-            )
-        
-        return result
-    
-    def apply_differential_privacy(self, data, epsilon=1.0):
-        """Apply differential privacy by adding noise"""
-        result = data.copy()
-        
-        # Add Laplace noise to numerical columns
-        numerical_cols = result.select_dtypes(include=[np.number]).columns
-        
-        for col in numerical_cols:
-            if col != 'id':  # Don't add noise to ID
-                # Calculate sensitivity (max - min)
-                sensitivity = result[col].max() - result[col].min()
-                if sensitivity > 0:
-                    # Add Laplace noise
-                    noise = np.random.laplace(0, sensitivity/epsilon, size=len(result))
-                    result[col] = result[col] + noise
-                    # Ensure values stay positive if original was positive
-                    if result[col].min() >= 0:
-                        result[col] = np.maximum(result[col], 0)
-        
-        return result
-    
-    def generate_synthetic_data(self, data, num_records=100):
-        """Generate synthetic data (simple version)"""
-        result = pd.DataFrame()
-        
-        for col in data.columns:
-            if col == 'id':
-                result[col] = range(1, num_records + 1)
-            elif data[col].dtype == 'object':
-                # Sample from original values
-                result[col] = np.random.choice(data[col].dropna(), size=num_records)
-            else:
-                # Generate from normal distribution with same mean/std
-                mean = data[col].mean()
-                std = data[col].std()
-                result[col] = np.random.normal(mean, std, size=num_records)
-                # Round if original was integer
-                if data[col].dtype in ['int64', 'int32']:
-                    result[col] = result[col].round().astype(int)
-        
-        return result
-    
-    def enhance_privacy(self, data):
-        """Apply selected privacy enhancement techniques"""
-        result = data.copy()
-        
-        # Apply k-anonymity if enabled
-        if self.config['privacy']['k_anonymity']['enabled']:
-            k_value = self.config['privacy']['k_anonymity']['k_value']
-            result = self.apply_k_anonymity(result, k_value)
-            
-        # Apply differential privacy if enabled  
-        if self.config['privacy']['differential_privacy']['enabled']:
-            epsilon = self.config['privacy']['differential_privacy']['epsilon']
-            result = self.apply_differential_privacy(result, epsilon)
-        
-        # Generate synthetic data if enabled
-        if self.config['privacy']['synthetic_data']['enabled']:
-            num_records = self.config['privacy']['synthetic_data']['num_records']
-            result = self.generate_synthetic_data(data, num_records)
-        
-        return result
-import pandas as pd
-import numpy as np
-from sklearn.preprocessing import LabelEncoder
+from src.mondrian import mondrian_generalize
+from src.hierarchies import hierarchies_from_config, hierarchy_generalize
+from src.differential_privacy import NoiseEngine, PrivacyBudgetAccountant
+from src.data_io import write_table
+from src.profiling import stage
 
 class PrivacyEnhancer:
     def __init__(self, config):
         self.config = config
+        self.noise_engine = NoiseEngine.from_config(config)
+        self.accountant = PrivacyBudgetAccountant.from_config(config)
         
+    @stage
     def apply_k_anonymity(self, data, k=5):
-        """Apply k-anonymity by generalization"""
-        result = data.copy()
-        quasi_identifiers = self.config['risk_settings']['quasi_identifiers']
-        
-        # Age generalization
-        if 'age' in result.columns:
-            result['age'] = (result['age'] // 10) * 10  # Round to nearest 10
-        
-        # Location generalization  
-        if 'location' in result.columns:
-            # Keep only major cities, group others as "Other"
-            major_cities = ['Mumbai', 'Delhi', 'Bangalore', 'Chennai']
-            result['location'] = result['location'].apply(
-                lambda x: x if x in major_cities else 'Other'
+        """Apply k-anonymity by generalization
+        
+        With ``hierarchies`` configured, every QI is recoded to the level of
+        its hierarchy chosen by a lattice search (full-domain
+        generalization, QIs without a hierarchy kept or suppressed);
+        otherwise by Mondrian multidimensional generalization.
+        """
+        settings = self.config['privacy']['k_anonymity']
+        quasi_identifiers = [qi for qi in self.config['risk_settings']['quasi_identifiers']
+                             if qi in data.columns]
+        
+        if settings.get('hierarchies'):
+            result, self.k_anonymity_summary = hierarchy_generalize(
+                data, quasi_identifiers, k, hierarchies_from_config(self.config, quasi_identifiers),
+                suppression_limit=settings.get('suppression_limit', 0.0)
             )
+            return result
         
+        result, self.k_anonymity_summary = mondrian_generalize(
+            data, quasi_identifiers, k,
+            numeric_format=settings.get('numeric_format', 'midpoint')
+        )
         return result
     
-    def apply_differential_privacy(self, data, epsilon=1.0):
-        """Apply differential privacy by adding noise"""
-        result = data.copy()
-        
-        # Add Laplace noise to numerical columns
-        numerical_cols = result.select_dtypes(include=[np.number]).columns
-        
-        for col in numerical_cols:
-            if col != 'id':  # Don't add noise to ID
-                # Calculate sensitivity (max - min)
-                sensitivity = result[col].max() - result[col].min()
-                if sensitivity > 0:
-                    # Add Laplace noise
-                    noise = np.random.laplace(0, sensitivity/epsilon, size=len(result))
-                    result[col] = result[col] + noise
-                    # Ensure values stay positive if original was positive
-                    if result[col].min() >= 0:
-                        result[col] = np.maximum(result[col], 0)
-        
+    @stage
+    def apply_differential_privacy(self, data, epsilon=1.0, stream=None, charge=True, inplace=False, exclude=(),
+                                   ranges=None):
+        """Apply differential privacy by adding noise to numerical columns
+        
+        Sensitivity comes from ``sensitivity`` in the config, else from the
+        clipping ``bounds``, else from the column's range. ``stream`` selects
+        an independent noise stream (e.g. the chunk number) and ``charge``
+        controls whether the release is recorded by the budget accountant;
+        disjoint chunks of one release should only be charged once.
+        Columns in ``exclude`` are released unchanged; pass the generalized
+        quasi-identifiers so the noise does not break their k-anonymity.
+        
+        Chunks of one release pass ``ranges`` (column -> (min, max) over the
+        whole release) so every chunk gets the same noise scale; a column
+        with neither a range nor a configured sensitivity or bounds then
+        raises ValueError instead of falling back on the chunk's own range.
+        """
+        settings = self.config['privacy']['differential_privacy']
+        bounds = settings.get('bounds') or {}
+        fixed_sensitivity = settings.get('sensitivity') or {}
+        result = data if inplace else data.copy(deep=False)
+        
+        numerical_cols = [col for col in result.select_dtypes(include=[np.number]).columns
+                          if col != 'id' and col not in exclude]  # Don't add noise to ID
+        if not numerical_cols:
+            return result
+        
+        dtype = np.float32 if settings.get('dtype') == 'float32' else np.float64
+        values = result[numerical_cols].to_numpy(dtype=dtype, copy=True)
+        lower = np.array([bounds.get(col, (-np.inf, np.inf))[0] for col in numerical_cols], dtype=dtype)
+        upper = np.array([bounds.get(col, (-np.inf, np.inf))[1] for col in numerical_cols], dtype=dtype)
+        if bounds:
+            np.clip(values, lower, upper, out=values)
+        
+        if ranges is None:
+            observed_min = np.nanmin(values, axis=0) if len(values) else np.zeros(len(numerical_cols))
+            observed_max = np.nanmax(values, axis=0) if len(values) else np.zeros(len(numerical_cols))
+        else:
+            unscaled = [col for col in numerical_cols
+                        if col not in ranges and col not in fixed_sensitivity and col not in bounds]
+            if unscaled:
+                raise ValueError(f"No sensitivity for {', '.join(unscaled)}; configure differential_privacy "
+                                 f"bounds or sensitivity to release it in chunks")
+            observed_min = np.array([ranges[col][0] if col in ranges else lower[i]
+                                     for i, col in enumerate(numerical_cols)], dtype=float)
+            observed_max = np.array([ranges[col][1] if col in ranges else upper[i]
+                                     for i, col in enumerate(numerical_cols)], dtype=float)
+        sensitivities = np.array([
+            fixed_sensitivity[col] if col in fixed_sensitivity
+            else upper[i] - lower[i] if col in bounds
+            else observed_max[i] - observed_min[i]
+            for i, col in enumerate(numerical_cols)
+        ], dtype=float)
+        
+        noisy = sensitivities > 0
+        if not noisy.any():
+            return result
+        noisy_cols = [col for col, keep in zip(numerical_cols, noisy) if keep]
+        values = values[:, noisy]
+        
+        if charge:
+            self.accountant.check(epsilon * len(noisy_cols))
+            for col in noisy_cols:
+                self.accountant.spend(epsilon, f"differential_privacy:{col}")
+        
+        # One batched draw for all columns
+        self.noise_engine.add_noise(values, sensitivities[noisy], epsilon, stream)
+        
+        # Keep values in the clipping bounds / non-negative if the original was
+        if bounds:
+            np.clip(values, lower[noisy], upper[noisy], out=values)
+        nonnegative = observed_min[noisy] >= 0
+        if nonnegative.any():
+            values[:, nonnegative] = np.maximum(values[:, nonnegative], 0)
+        
+        result[noisy_cols] = values
         return result
     
-    def generate_synthetic_data(self, data, num_records=100):
-        """Generate synthetic data (simple version)"""
-        result = pd.DataFrame()
-        
-        for col in data.columns:
-            if col == 'id':
-                result[col] = range(1, num_records + 1)
-            elif data[col].dtype == 'object':
-                # Sample from original values
-                result[col] = np.random.choice(data[col].dropna(), size=num_records)
-            else:
-                # Generate from normal distribution with same mean/std
-                mean = data[col].mean()
-                std = data[col].std()
-                result[col] = np.random.normal(mean, std, size=num_records)
-                # Round if original was integer
-                if data[col].dtype in ['int64', 'int32']:
-                    result[col] = result[col].round().astype(int)
-        
+    @stage
+    def generate_synthetic_data(self, data, num_records=100, output_file=None, output_format=None):
+        """Generate synthetic data from a Gaussian copula fitted to ``data``
+        
+        With ``output_file`` the rows are written there batch by batch, so
+        memory does not grow with ``num_records``, and only the first batch
+        (a uniform sample of the rows written) is returned.
+        """
+        from src.synthesis import GaussianCopulaSynthesizer
+        
+        settings = self.config['privacy']['synthetic_data']
+        synthesizer = GaussianCopulaSynthesizer.from_config(self.config).fit(data)
+        if settings.get('model_file'):
+            synthesizer.save(settings['model_file'])
+        
+        batch_size = settings.get('batch_size', 100000)
+        if output_file:
+            result = synthesizer.sample_to_file(num_records, output_file, batch_size, output_format)
+        else:
+            result = synthesizer.sample(num_records, batch_size)
+        self.synthesis_stats = {'fit': synthesizer.fit_stats, 'sample': synthesizer.sample_stats}
         return result
     
-    def enhance_privacy(self, data):
-        """Apply selected privacy enhancement techniques"""
-        result = data.copy()
+    @stage
+    def enhance_privacy(self, data, output_file=None, output_format=None):
+        """Apply selected privacy enhancement techniques
+        
+        With ``output_file`` the release is also written there; synthetic
+        data is then streamed to the file and only its first batch returned.
+        """
+        # Every technique returns a new frame, so the input is never modified
+        result = data
+        generalized = []
         
         # Apply k-anonymity if enabled
         if self.config['privacy']['k_anonymity']['enabled']:
             k_value = self.config['privacy']['k_anonymity']['k_value']
             result = self.apply_k_anonymity(result, k_value)
+            generalized = self.k_anonymity_summary['quasi_identifiers']
             
         # Apply differential privacy if enabled  
         if self.config['privacy']['differential_privacy']['enabled']:
             epsilon = self.config['privacy']['differential_privacy']['epsilon']
-            result = self.apply_differential_privacy(result, epsilon)
+            result = self.apply_differential_privacy(result, epsilon, exclude=generalized)
         
         # Generate synthetic data if enabled
         if self.config['privacy']['synthetic_data']['enabled']:
             num_records = self.config['privacy']['synthetic_data']['num_records']
-            result = self.generate_synthetic_data(data, num_records)
+            return self.generate_synthetic_data(data, num_records, output_file, output_format)
         
+        if output_file:
+            write_table(result, output_file, output_format)
         return result
@@ -0,0 +1,194 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _rows(value):
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    if isinstance(value, tuple):
+        for item in value:
+            if isinstance(item, pd.DataFrame):
+                return len(item)
+    return None
+
+
+class Profiler:
+    """Record wall time, CPU time, memory and row counts of pipeline stages.
+
+    Each call of an instrumented stage becomes a span holding its wall time,
+    the CPU time of the calling thread, the process peak RSS at its end and
+    how much the stage raised it, the net change in allocated memory blocks
+    and the rows of the first DataFrame argument and of the result. Spans of
+    stages that run in worker processes are not recorded. Errors a stage
+    catches and reports instead of raising are recorded with ``record_error``.
+    """
+
+    def __init__(self, trace_file=None):
+        self.trace_file = trace_file
+        self.spans = []
+        self.errors = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, enabled=False):
+        """The configured profiler, or None unless profiling is enabled"""
+        settings = config.get('profiling') or {}
+        if not (enabled or settings.get('enabled')):
+            return None
+        return cls(settings.get('trace_file', 'reports/trace.json'))
+
+    def record(self, name, fn, args, kwargs):
+        """Call ``fn`` and record a span for it"""
+        rows_in = next((len(value) for value in list(args) + list(kwargs.values())
+                        if isinstance(value, pd.DataFrame)), None)
+        rss_before = _peak_rss_mb()
+        blocks_before = sys.getallocatedblocks()
+        cpu_start = time.thread_time()
+        start = time.perf_counter()
+        result = None
+        try:
+            result = fn(*args, **kwargs)
+            return result
+        finally:
+            end = time.perf_counter()
+            rss_after = _peak_rss_mb()
+            span = {
+                'name': name,
+                'start': start - self._origin,
+                'wall': end - start,
+                'cpu': time.thread_time() - cpu_start,
+                'peak_rss_mb': rss_after,
+                'rss_growth_mb': rss_after - rss_before if rss_after is not None else None,
+                'allocated_blocks': sys.getallocatedblocks() - blocks_before,
+                'rows_in': rows_in,
+                'rows_out': _rows(result),
+                'thread': threading.get_native_id(),
+            }
+            with self._lock:
+                self.spans.append(span)
+
+    def record_error(self, stage, error):
+        with self._lock:
+            self.errors.append({
+                'stage': stage,
+                'time': time.perf_counter() - self._origin,
+                'error': f"{type(error).__name__}: {error}",
+                'traceback': ''.join(traceback.format_exception(type(error), error, error.__traceback__)),
+            })
+
+    def summary(self):
+        """Per-stage totals in first-call order, plus the recorded errors"""
+        stages = {}
+        for span in self.spans:
+            stage = stages.setdefault(span['name'], {
+                'name': span['name'], 'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'peak_rss_mb': None,
+                'allocated_blocks': 0, 'rows_in': None, 'rows_out': None,
+            })
+            stage['calls'] += 1
+            stage['wall'] += span['wall']
+            stage['cpu'] += span['cpu']
+            stage['allocated_blocks'] += span['allocated_blocks']
+            if span['peak_rss_mb'] is not None:
+                stage['peak_rss_mb'] = max(stage['peak_rss_mb'] or 0, span['peak_rss_mb'])
+            for key in ('rows_in', 'rows_out'):
+                if span[key] is not None:
+                    stage[key] = (stage[key] or 0) + span[key]
+        return {'stages': list(stages.values()), 'errors': [
+            {'stage': error['stage'], 'error': error['error']} for error in self.errors
+        ]}
+
+    def chrome_trace(self):
+        """The spans as a Chrome trace (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        events = []
+        for span in self.spans:
+            events.append({
+                'name': span['name'],
+                'cat': span['name'].split('.')[0],
+                'ph': 'X',
+                'ts': span['start'] * 1e6,
+                'dur': span['wall'] * 1e6,
+                'pid': pid,
+                'tid': span['thread'],
+                'args': {key: span[key] for key in ('cpu', 'peak_rss_mb', 'rss_growth_mb',
+                                                    'allocated_blocks', 'rows_in', 'rows_out')},
+            })
+        for error in self.errors:
+            events.append({
+                'name': f"error: {error['stage']}",
+                'cat': 'error',
+                'ph': 'i',
+                's': 'p',
+                'ts': error['time'] * 1e6,
+                'pid': pid,
+                'tid': 0,
+                'args': {'error': error['error'], 'traceback': error['traceback']},
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_trace(self, path=None):
+        path = path or self.trace_file
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+
+# The profiler stages report to; None when profiling is off
+_active = None
+
+
+def activate(profiler):
+    global _active
+    _active = profiler
+
+
+def deactivate():
+    global _active
+    _active = None
+
+
+def active():
+    return _active
+
+
+def record_error(stage, error):
+    """Record an error a stage handled itself, if profiling is on"""
+    if _active is not None:
+        _active.record_error(stage, error)
+
+
+def stage(fn):
+    """Instrument a stage method; a plain call when profiling is off"""
+    name = fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _active is None:
+            return fn(*args, **kwargs)
+        return _active.record(name, fn, args, kwargs)
+
+    return wrapper
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+
+def _column_codes(series):
+    """Integer codes for one column, -1 marking missing values"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy().astype(np.int64)
+        return codes, len(series.cat.categories)
+    codes, uniques = pd.factorize(series)
+    return codes.astype(np.int64), len(uniques)
+
+
+class EquivalenceClassIndex:
+    """Equivalence classes of a dataset over a list of quasi-identifiers.
+
+    Every QI column is factorized once and the per-column codes are combined
+    into a single int64 key (mixed radix, re-densified whenever the radix
+    would overflow), so the whole index costs a handful of linear passes.
+    Records with a missing QI value belong to no class (code -1), matching
+    ``groupby`` semantics.
+    """
+
+    def __init__(self, data, quasi_identifiers):
+        self.quasi_identifiers = list(quasi_identifiers)
+        self.n_rows = len(data)
+
+        key = np.zeros(self.n_rows, dtype=np.int64)
+        radix = 1
+        missing = np.zeros(self.n_rows, dtype=bool)
+        for qi in self.quasi_identifiers:
+            codes, cardinality = _column_codes(data[qi])
+            missing |= codes < 0
+            if radix * max(cardinality, 1) >= 2 ** 62:
+                key, uniques = pd.factorize(key)
+                radix = len(uniques)
+            key = key * max(cardinality, 1) + np.maximum(codes, 0)
+            radix *= max(cardinality, 1)
+
+        class_codes = np.full(self.n_rows, -1, dtype=np.int64)
+        if self.n_rows:
+            dense, _ = pd.factorize(key[~missing])
+            class_codes[~missing] = dense
+        self.class_codes = class_codes
+        self.group_sizes = np.bincount(class_codes[~missing])
+        self._data = data
+        self._class_keys = None
+
+    @property
+    def n_classes(self):
+        return len(self.group_sizes)
+
+    @property
+    def min_size(self):
+        return self.group_sizes.min() if self.n_classes else 0
+
+    def record_group_sizes(self):
+        """Size of the equivalence class of every record (0 if it has none)"""
+        sizes = np.zeros(self.n_rows, dtype=np.int64)
+        valid = self.class_codes >= 0
+        sizes[valid] = self.group_sizes[self.class_codes[valid]]
+        return sizes
+
+    def class_keys(self):
+        """QI values of every class, one row per class code"""
+        if self._class_keys is None:
+            # factorize numbers classes in order of first appearance, so a
+            # class starts wherever the running maximum code increases
+            valid = np.flatnonzero(self.class_codes >= 0)
+            running_max = np.maximum.accumulate(self.class_codes[valid])
+            first_rows = valid[np.diff(running_max, prepend=-1) > 0]
+            self._class_keys = (self._data[self.quasi_identifiers]
+                                .iloc[first_rows]
+                                .reset_index(drop=True))
+        return self._class_keys
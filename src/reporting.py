@@ -1,49 +1,138 @@
-import yaml
-from fpdf import FPDF
-import pandas as pd
+import io
 import os
+from html import escape
+from string import Template
+
+from src.profiling import stage
+
+# One self-contained page: styles inline, plots embedded as SVG elements
+HTML_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Privacy-Utility Report</title>
+<style>
+body { font-family: sans-serif; margin: 2em; color: #222; }
+table { border-collapse: collapse; margin-bottom: 1em; }
+th, td { border: 1px solid #ccc; padding: 0.25em 0.6em; text-align: left; }
+.plots { display: grid; grid-template-columns: repeat(auto-fill, minmax(24em, 1fr)); gap: 1em; }
+.plots figure { margin: 0; }
+.plots svg { width: 100%; height: auto; }
+</style>
+</head>
+<body>
+<h1>SafeData Privacy-Utility Report</h1>
+<h2>Risk Assessment</h2>
+$risk
+<h2>Utility Measurement</h2>
+$utility
+$plots
+$profile
+</body>
+</html>
+""")
 
 class ReportGenerator:
     def __init__(self, config):
         self.config = config
-        self.output_dir = "reports"
+        self.output_dir = (config.get('output') or {}).get('directory', "reports")
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def generate_html_report(self, risk_report, utility_report):
-        """Generate an HTML report"""
-        html = ["<html><head><title>Privacy-Utility Report</title></head><body>"]
-        html.append("<h1>SafeData Privacy-Utility Report</h1>")
-        
-        html.append("<h2>Risk Assessment</h2><ul>")
+    def _plots_shown(self, utility_report):
+        return (self.config.get('output') or {}).get('show_plots', True) and bool(utility_report.get('plots'))
+
+    @stage
+    def generate_html_report(self, risk_report, utility_report, profile=None):
+        """Generate a self-contained HTML report"""
+        risk = ["<ul>"]
         for k, v in risk_report.items():
-            html.append(f"<li><strong>{k}:</strong> {v}</li>")
-        html.append("</ul>")
+            risk.append(f"<li><strong>{escape(str(k))}:</strong> {escape(str(v))}</li>")
+        risk.append("</ul>")
         
-        html.append("<h2>Utility Measurement</h2><ul>")
-        # Statistical similarity
+        # Statistical similarity, one row per column
+        utility = ["<table><tr><th>Column</th><th>Similarity</th></tr>"]
         stats = utility_report['statistical_similarity']
         for col, metrics in stats.items():
-            html.append(f"<li><strong>{col}:</strong> mean_diff={metrics['mean_difference']:.3f}, "
-                        f"corr={metrics['correlation']:.3f}</li>")
+            utility.append(f"<tr><td>{escape(str(col))}</td><td>{escape(self._similarity_summary(metrics))}</td></tr>")
+        utility.append("</table><ul>")
+        structure = utility_report.get('correlation_matrix')
+        if structure and structure['worst_pair']:
+            utility.append(f"<li><strong>Correlation matrix:</strong> {escape(self._structure_summary(structure))}</li>")
         # ML utility
         ml = utility_report['ml_utility']
-        html.append(f"<li><strong>ML Accuracy:</strong> orig={ml['original_accuracy']:.3f}, "
-                    f"prot={ml['protected_accuracy']:.3f}, loss={ml['accuracy_loss']:.3f}</li>")
-        html.append("</ul>")
+        utility.append(f"<li><strong>ML Accuracy:</strong> orig={ml['original_accuracy']:.3f}, "
+                       f"prot={ml['protected_accuracy']:.3f}, loss={ml['accuracy_loss']:.3f}</li>")
+        for model in ml.get('models', []):
+            utility.append(f"<li><strong>{escape(model['model'])} ({escape(str(model['target']))}):</strong> "
+                           f"{escape(self._model_summary(model))}</li>")
+        utility.append("</ul>")
         
-        if self.config['output']['show_plots'] and os.path.exists("reports/comparison_plots.png"):
-            html.append("<h2>Comparison Plots</h2>")
-            html.append('<img src="comparison_plots.png" width="600"/>')
+        plots = []
+        if self._plots_shown(utility_report):
+            plots.append("<h2>Comparison Plots</h2><div class=\"plots\">")
+            for col, svg in utility_report['plots'].items():
+                plots.append(f"<figure title=\"{escape(str(col))}\">{svg}</figure>")
+            plots.append("</div>")
         
-        html.append("</body></html>")
+        sections = []
+        if profile:
+            sections.append("<h2>Pipeline Profile</h2>")
+            sections.append("<table><tr><th>Stage</th><th>Calls</th><th>Wall (s)</th>"
+                            "<th>CPU (s)</th><th>Peak RSS (MB)</th><th>Allocated blocks</th>"
+                            "<th>Rows in</th><th>Rows out</th></tr>")
+            for stage in profile['stages']:
+                sections.append(f"<tr><td>{escape(stage['name'])}</td><td>{stage['calls']}</td>"
+                                f"<td>{stage['wall']:.3f}</td><td>{stage['cpu']:.3f}</td>"
+                                f"<td>{self._format_optional(stage['peak_rss_mb'], '.1f')}</td>"
+                                f"<td>{stage['allocated_blocks']}</td>"
+                                f"<td>{self._format_optional(stage['rows_in'])}</td>"
+                                f"<td>{self._format_optional(stage['rows_out'])}</td></tr>")
+            sections.append("</table>")
+            if profile['errors']:
+                sections.append("<h3>Handled errors</h3><ul>")
+                for error in profile['errors']:
+                    sections.append(f"<li><strong>{escape(error['stage'])}:</strong> {escape(error['error'])}</li>")
+                sections.append("</ul>")
         
+        html = HTML_TEMPLATE.substitute(risk="\n".join(risk), utility="\n".join(utility),
+                                        plots="\n".join(plots), profile="\n".join(sections))
         path = os.path.join(self.output_dir, "report.html")
-        with open(path, "w") as f:
-            f.write("\n".join(html))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
         return path
 
-    def generate_pdf_report(self, risk_report, utility_report):
+    @staticmethod
+    def _similarity_summary(metrics):
+        if metrics.get('kind') == 'categorical':
+            return (f"total_variation={metrics['total_variation']:.3f} "
+                    f"({metrics['original_categories']} -> {metrics['protected_categories']} categories)")
+        return (f"mean_diff={metrics['mean_difference']:.3f}, corr={metrics['correlation']:.3f}, "
+                f"ks={metrics['ks']:.3f}, wasserstein={metrics['wasserstein']:.3g}")
+
+    @staticmethod
+    def _structure_summary(structure):
+        first, second = structure['worst_pair']
+        return (f"max |diff|={structure['max_abs_difference']:.3f} ({first}/{second}), "
+                f"mean |diff|={structure['mean_abs_difference']:.3f}")
+
+    @staticmethod
+    def _model_summary(model):
+        summary = (f"orig={model['original_accuracy']:.3f}±{model['original_accuracy_std']:.3f}, "
+                   f"prot={model['protected_accuracy']:.3f}±{model['protected_accuracy_std']:.3f}")
+        if 'tstr_accuracy' in model:
+            summary += f", tstr={model['tstr_accuracy']:.3f}"
+        return (summary + f" ({model['folds']}-fold, fit {model['original_fit_time']:.2f}s / "
+                f"{model['protected_fit_time']:.2f}s)")
+
+    @staticmethod
+    def _format_optional(value, spec=''):
+        return '-' if value is None else format(value, spec)
+
+    @stage
+    def generate_pdf_report(self, risk_report, utility_report, profile=None):
         """Generate a PDF report"""
+        from fpdf import FPDF
+        
         pdf = FPDF()
         pdf.set_auto_page_break(auto=True, margin=15)
         pdf.add_page()
@@ -60,27 +149,50 @@ class ReportGenerator:
         pdf.cell(0, 8, "Utility Measurement:", ln=True)
         stats = utility_report['statistical_similarity']
         for col, metrics in stats.items():
-            pdf.cell(0, 6, 
-                     f"{col}: mean_diff={metrics['mean_difference']:.3f}, corr={metrics['correlation']:.3f}", 
-                     ln=True)
+            pdf.cell(0, 6, f"{col}: {self._similarity_summary(metrics)}", ln=True)
+        structure = utility_report.get('correlation_matrix')
+        if structure and structure['worst_pair']:
+            pdf.cell(0, 6, f"Correlation matrix: {self._structure_summary(structure)}", ln=True)
         ml = utility_report['ml_utility']
         pdf.ln(2)
         pdf.cell(0, 6, f"ML Accuracy: orig={ml['original_accuracy']:.3f}, "
                        f"prot={ml['protected_accuracy']:.3f}", ln=True)
+        for model in ml.get('models', []):
+            pdf.cell(0, 6, f"{model['model']} ({model['target']}): {self._model_summary(model)}", ln=True)
+        
+        if self._plots_shown(utility_report):
+            # Two plots per row, straight from the SVG
+            pdf.add_page()
+            for i, svg in enumerate(utility_report['plots'].values()):
+                if i % 2 == 0 and i > 0:
+                    pdf.ln(62)
+                    if pdf.will_page_break(62):
+                        pdf.add_page()
+                pdf.image(io.BytesIO(svg.encode()), x=15 + (i % 2) * 92, y=pdf.get_y(), w=88)
         
-        plot_path = "reports/comparison_plots.png"
-        if self.config['output']['show_plots'] and os.path.exists(plot_path):
+        if profile:
             pdf.add_page()
-            pdf.image(plot_path, x=15, w=180)
+            pdf.set_font("Arial", "B", 12)
+            pdf.cell(0, 8, "Pipeline Profile:", ln=True)
+            pdf.set_font("Arial", "", 9)
+            for stage in profile['stages']:
+                pdf.cell(0, 5,
+                         f"{stage['name']}: calls={stage['calls']}, wall={stage['wall']:.3f}s, "
+                         f"cpu={stage['cpu']:.3f}s, peak_rss={self._format_optional(stage['peak_rss_mb'], '.1f')}MB, "
+                         f"blocks={stage['allocated_blocks']}, rows={self._format_optional(stage['rows_in'])}"
+                         f"->{self._format_optional(stage['rows_out'])}",
+                         ln=True)
+            for error in profile['errors']:
+                pdf.cell(0, 5, f"Handled error in {error['stage']}: {error['error']}", ln=True)
         
         out_path = os.path.join(self.output_dir, "report.pdf")
         pdf.output(out_path)
         return out_path
 
-    def generate_report(self, risk_report, utility_report):
+    def generate_report(self, risk_report, utility_report, profile=None):
         """Choose format and generate report"""
         fmt = self.config['output']['report_format']
         if fmt == "pdf":
-            return self.generate_pdf_report(risk_report, utility_report)
+            return self.generate_pdf_report(risk_report, utility_report, profile)
         else:
-            return self.generate_html_report(risk_report, utility_report)
+            return self.generate_html_report(risk_report, utility_report, profile)
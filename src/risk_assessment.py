@@ -1,31 +1,100 @@
+import copy
+
 import pandas as pd
 import numpy as np
-from collections import Counter
+
+from src.linkage import LinkageEngine
+from src.qi_index import EquivalenceClassIndex
+from src.diversity import sensitive_attribute_metrics
+from src.data_io import read_table
+from src.profiling import stage
 
 class RiskAssessor:
     def __init__(self, config):
         self.config = config
         self.quasi_identifiers = config['risk_settings']['quasi_identifiers']
         
-    def load_data(self, data_file, ground_truth_file=None):
-        """Load the datasets"""
-        self.data = pd.read_csv(data_file)
+    @property
+    def data(self):
+        return self._data
+    
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self._qi_index = None
+        self.diversity_result = None
+    
+    @property
+    def quasi_identifiers(self):
+        return self._quasi_identifiers
+    
+    @quasi_identifiers.setter
+    def quasi_identifiers(self, value):
+        self._quasi_identifiers = list(value)
+        self._qi_index = None
+        self.diversity_result = None
+    
+    def with_config(self, config):
+        """Assessor of the same data and QIs under another ``config`` (e.g. other thresholds)
+        
+        A shallow copy: the cached QI index and sensitive-attribute metrics
+        are shared, so build them on this assessor first.
+        """
+        view = copy.copy(self)
+        view.config = config
+        return view
+    
+    def qi_index(self, data=None):
+        """Equivalence-class index over the available quasi-identifiers.
+        
+        The index of the assessor's own data is built once and cached until
+        ``data`` or ``quasi_identifiers`` is reassigned; other frames get a
+        fresh, uncached index. Returns None if no quasi-identifier is present.
+        """
+        own_data = data is None or data is getattr(self, '_data', None)
+        if own_data:
+            data = self.data
+            if self._qi_index is not None:
+                return self._qi_index
+        
+        available_qi = [qi for qi in self.quasi_identifiers if qi in data.columns]
+        if not available_qi:
+            return None
+        
+        index = EquivalenceClassIndex(data, available_qi)
+        if own_data:
+            self._qi_index = index
+        return index
+    
+    @stage
+    def load_data(self, data_file, ground_truth_file=None, columns=None):
+        """Load the datasets
+        
+        The format (CSV, Parquet, Feather/Arrow) and dtypes come from
+        ``data_settings``; ``columns`` limits the read to those columns.
+        """
+        settings = self.config['data_settings']
+        self.data = read_table(
+            data_file, settings.get('input_format'), columns=columns,
+            dtypes=settings.get('dtypes'), memory_map=settings.get('memory_map', True)
+        )
         if ground_truth_file:
-            self.ground_truth = pd.read_csv(ground_truth_file)
+            self.ground_truth = read_table(ground_truth_file, memory_map=settings.get('memory_map', True))
         return self.data
     
+    @stage
     def calculate_k_anonymity(self, data=None):
         """Calculate k-anonymity for the dataset"""
-        if data is None:
-            data = self.data
-            
-        # Group by quasi-identifiers
-        available_qi = [qi for qi in self.quasi_identifiers if qi in data.columns]
-        if not available_qi:
+        # Equivalence classes over the quasi-identifiers
+        index = self.qi_index(data)
+        if index is None:
             return float('inf'), "No quasi-identifiers found"
         
-        groups = data.groupby(available_qi).size()
-        k_value = groups.min()
+        return self.summarize_group_sizes(index.group_sizes)
+    
+    def summarize_group_sizes(self, groups):
+        """Summarize equivalence-class sizes into the k-anonymity result"""
+        k_value = groups.min() if len(groups) else 0
         
         # Count how many groups have k < threshold
         threshold = self.config['privacy']['k_anonymity']['k_value']
@@ -33,45 +102,126 @@ class RiskAssessor:
         
         return k_value, f"Minimum group size: {k_value}, Risky groups: {risky_groups}"
     
+    @stage
     def simulate_linkage_attack(self):
-        """Simulate a simple linkage attack"""
+        """Simulate a linkage attack against the ground truth data"""
         if not hasattr(self, 'ground_truth'):
             return 0, "No ground truth data available"
         
-        # Try to match records based on quasi-identifiers
-        matches = 0
-        total_attempts = 0
-        
-        for idx, row in self.data.iterrows():
-            total_attempts += 1
-            # Simple matching logic
-            for gt_idx, gt_row in self.ground_truth.iterrows():
-                if row['id'] == gt_row['id']:  # Found match
-                    matches += 1
-                    break
+        # Match records on the configured join keys / quasi-identifiers
+        self.linkage_result = LinkageEngine(self.config).link(self.data, self.ground_truth)
+        if self.linkage_result is None:
+            return 0, "No common join keys between data and ground truth"
         
-        success_rate = (matches / total_attempts) * 100 if total_attempts > 0 else 0
+        matches = self.linkage_result['matches']
+        total_attempts = self.linkage_result['total']
+        success_rate = self.linkage_result['success_rate']
         return success_rate, f"Linked {matches}/{total_attempts} records ({success_rate:.1f}%)"
     
-    def assess_prosecutor_risk(self):
+    def assess_prosecutor_risk(self, k_value=None):
         """Prosecutor model: attacker knows person is in dataset"""
-        k_value, _ = self.calculate_k_anonymity()
+        if k_value is None:
+            k_value, _ = self.calculate_k_anonymity()
         risk = 1.0 / k_value if k_value > 0 else 1.0
         return risk, f"Prosecutor risk: {risk:.3f} (1/{k_value})"
     
-    def assess_journalist_risk(self):
+    def assess_journalist_risk(self, k_value=None, dataset_size=None):
         """Journalist model: attacker suspects person might be in dataset"""
-        k_value, _ = self.calculate_k_anonymity()
-        dataset_size = len(self.data)
+        if k_value is None:
+            k_value, _ = self.calculate_k_anonymity()
+        if dataset_size is None:
+            dataset_size = len(self.data)
         risk = 1.0 / (k_value * dataset_size) if k_value > 0 and dataset_size > 0 else 1.0
         return risk, f"Journalist risk: {risk:.6f}"
     
+    def sensitive_attribute_metrics(self):
+        """Per-class l-diversity and t-closeness of every sensitive attribute
+        
+        Returns {attribute: DataFrame} with the class QI values followed by
+        size, distinct_l, entropy_l and t_closeness, one row per
+        equivalence class; also kept as ``self.diversity_result``.
+        """
+        index = self.qi_index()
+        attributes = [attr for attr in self.config['risk_settings'].get('sensitive_attributes', [])
+                      if attr in self.data.columns and attr not in self.quasi_identifiers]
+        self.diversity_result = {}
+        if index is None:
+            return self.diversity_result
+        keys = index.class_keys()
+        for attr in attributes:
+            metrics = sensitive_attribute_metrics(index, self.data[attr])
+            self.diversity_result[attr] = pd.concat([keys, metrics], axis=1)
+        return self.diversity_result
+    
+    def _worst_offenders(self, metric, ascending):
+        """Compact description of the worst classes for ``metric`` across attributes"""
+        limit = self.config['risk_settings'].get('worst_offenders', 5)
+        rows = []
+        for attr, classes in self.diversity_result.items():
+            worst = classes.dropna(subset=[metric]).sort_values(metric, ascending=ascending).head(limit)
+            for _, row in worst.iterrows():
+                key = ", ".join(f"{qi}={row[qi]}" for qi in classes.columns if qi in self.quasi_identifiers)
+                rows.append((row[metric], f"{attr} [{key}] {metric}={row[metric]:.3g}"))
+        rows.sort(key=lambda item: item[0], reverse=not ascending)
+        return "; ".join(text for _, text in rows[:limit])
+    
+    @stage
+    def assess_l_diversity(self):
+        """Distinct and entropy l-diversity over the sensitive attributes"""
+        if self.diversity_result is None:
+            self.sensitive_attribute_metrics()
+        if not self.diversity_result:
+            return float('inf'), "No sensitive attributes found"
+        
+        threshold = self.config['risk_settings'].get('l_value', 2)
+        summary = []
+        l_values = []
+        for attr, classes in self.diversity_result.items():
+            distinct_l = classes['distinct_l'].min() if len(classes) else 0
+            entropy_l = classes['entropy_l'].min() if len(classes) else 0
+            risky = (classes['distinct_l'] < threshold).sum()
+            l_values.append(distinct_l)
+            summary.append(f"{attr}: distinct l={distinct_l}, entropy l={entropy_l:.2f}, "
+                           f"classes with l < {threshold}: {risky}")
+        l_value = min(l_values)
+        message = "; ".join(summary)
+        if l_value < threshold:
+            message += f". Worst classes: {self._worst_offenders('distinct_l', ascending=True)}"
+        return l_value, message
+    
+    @stage
+    def assess_t_closeness(self):
+        """t-closeness (EMD for numeric, variational distance for categorical attributes)"""
+        if self.diversity_result is None:
+            self.sensitive_attribute_metrics()
+        if not self.diversity_result:
+            return 0.0, "No sensitive attributes found"
+        
+        threshold = self.config['risk_settings'].get('t_value', 0.2)
+        summary = []
+        t_values = []
+        for attr, classes in self.diversity_result.items():
+            t_value = classes['t_closeness'].max() if classes['t_closeness'].notna().any() else 0.0
+            risky = (classes['t_closeness'] > threshold).sum()
+            t_values.append(t_value)
+            summary.append(f"{attr}: t={t_value:.3f} ({classes['measure'].iloc[0] if len(classes) else 'n/a'}), "
+                           f"classes with t > {threshold}: {risky}")
+        t_value = max(t_values)
+        message = "; ".join(summary)
+        if t_value > threshold:
+            message += f". Worst classes: {self._worst_offenders('t_closeness', ascending=False)}"
+        return t_value, message
+    
+    @stage
     def generate_risk_report(self):
         """Generate comprehensive risk assessment"""
+        k_anonymity = self.calculate_k_anonymity()
         report = {
-            'k_anonymity': self.calculate_k_anonymity(),
+            'k_anonymity': k_anonymity,
             'linkage_attack': self.simulate_linkage_attack(),
-            'prosecutor_risk': self.assess_prosecutor_risk(),
-            'journalist_risk': self.assess_journalist_risk()
+            'prosecutor_risk': self.assess_prosecutor_risk(k_anonymity[0]),
+            'journalist_risk': self.assess_journalist_risk(k_anonymity[0]),
+            'l_diversity': self.assess_l_diversity(),
+            't_closeness': self.assess_t_closeness()
         }
         return report
@@ -0,0 +1,200 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+class SharedFrame:
+    """Picklable handle to a DataFrame whose numeric columns live in shared memory.
+
+    Numeric columns are copied once into a single shared-memory block; a
+    worker process rebuilds the frame from zero-copy views of that block, so
+    only the handle and the non-numeric columns are pickled per task.
+    """
+
+    def __init__(self, frame):
+        numeric = [col for col in frame.columns
+                   if isinstance(frame[col].dtype, np.dtype) and frame[col].dtype.kind in 'iuf']
+        arrays = [frame[col].to_numpy() for col in numeric]
+        self.layout = []
+        offset = 0
+        for col, array in zip(numeric, arrays):
+            self.layout.append((col, array.dtype.str, offset))
+            offset += array.nbytes
+        self.length = len(frame)
+        self.columns = list(frame.columns)
+        self.other = frame.drop(columns=numeric)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (col, dtype, start), array in zip(self.layout, arrays):
+            np.ndarray(len(array), dtype=dtype, buffer=self.shm.buf, offset=start)[:] = array
+        self.name = self.shm.name
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['shm'] = None
+        return state
+
+    def load(self):
+        """Rebuild the DataFrame on top of the shared block"""
+        if self.shm is None:
+            self.shm = shared_memory.SharedMemory(name=self.name)
+        columns = {col: np.ndarray(self.length, dtype=dtype, buffer=self.shm.buf, offset=start)
+                   for col, dtype, start in self.layout}
+        frame = pd.DataFrame(columns, index=self.other.index, copy=False)
+        for col in self.other.columns:
+            frame[col] = self.other[col]
+        return frame[self.columns]
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+
+    def unlink(self):
+        shm = self.shm or shared_memory.SharedMemory(name=self.name)
+        shm.close()
+        shm.unlink()
+
+
+# Shared blocks attached by this worker process; kept open because frames
+# returned by a task may still reference them while being pickled
+_attached = {}
+
+
+def _load_shared(value):
+    if not isinstance(value, SharedFrame):
+        return value
+    if value.name in _attached:
+        value.shm = _attached[value.name]
+    frame = value.load()
+    _attached[value.name] = value.shm
+    return frame
+
+
+def _call_shared(fn, args, kwargs):
+    """Worker-side trampoline that materializes SharedFrame arguments"""
+    args = [_load_shared(value) for value in args]
+    kwargs = {key: _load_shared(value) for key, value in kwargs.items()}
+    return fn(*args, **kwargs)
+
+
+class TaskResult:
+    """Placeholder for the return value of a scheduled task"""
+
+    def __init__(self, name):
+        self.name = name
+
+
+class TaskScheduler:
+    """Run named tasks with dependencies on a thread or process pool.
+
+    Tasks are added with ``add(name, fn, *args, after=(...))``; an argument
+    that is a ``TaskResult`` (as returned by ``add``) is replaced by that
+    task's return value. ``run`` starts every task as soon as its
+    dependencies have finished and records the wall-clock time of each one
+    in ``timings``. With ``workers: 1`` everything runs inline in the calling
+    thread. In process mode DataFrame arguments are passed through shared
+    memory.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        settings = config.get('processing') or {}
+        self.workers = settings.get('workers', 1)
+        self.executor = settings.get('executor', 'thread')
+        self.tasks = {}
+        self.timings = {}
+
+    def add(self, name, fn, *args, after=(), **kwargs):
+        deps = set(after)
+        deps.update(value.name for value in list(args) + list(kwargs.values())
+                    if isinstance(value, TaskResult))
+        self.tasks[name] = (fn, args, kwargs, deps)
+        return TaskResult(name)
+
+    def _pool(self):
+        if self.executor == 'process':
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=self.workers)
+
+    def _resolve(self, values, results):
+        return [results[value.name] if isinstance(value, TaskResult) else value for value in values]
+
+    def _share(self, values, shared):
+        out = []
+        for value in values:
+            if isinstance(value, pd.DataFrame):
+                key = id(value)
+                if key not in shared:
+                    shared[key] = SharedFrame(value)
+                value = shared[key]
+            out.append(value)
+        return out
+
+    def _timed(self, name, fn, args, kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def run(self):
+        """Execute all added tasks and return their results by name"""
+        results = {}
+        pending = dict(self.tasks)
+        self.tasks = {}
+
+        if self.workers <= 1:
+            while pending:
+                ready = [name for name, task in pending.items() if task[3] <= results.keys()]
+                if not ready:
+                    raise ValueError(f"Unresolvable task dependencies: {sorted(pending)}")
+                for name in ready:
+                    fn, args, kwargs, _ = pending.pop(name)
+                    args = self._resolve(args, results)
+                    kwargs = dict(zip(kwargs, self._resolve(kwargs.values(), results)))
+                    results[name] = self._timed(name, fn, args, kwargs)
+            return results
+
+        shared = {}
+        running = {}
+        started = {}
+        try:
+            with self._pool() as pool:
+                while pending or running:
+                    ready = [name for name, task in pending.items() if task[3] <= results.keys()]
+                    for name in ready:
+                        fn, args, kwargs, _ = pending.pop(name)
+                        args = self._resolve(args, results)
+                        kwargs = dict(zip(kwargs, self._resolve(kwargs.values(), results)))
+                        started[name] = time.perf_counter()
+                        if self.executor == 'process':
+                            args = self._share(args, shared)
+                            kwargs = dict(zip(kwargs, self._share(kwargs.values(), shared)))
+                            future = pool.submit(_call_shared, fn, args, kwargs)
+                        else:
+                            future = pool.submit(fn, *args, **kwargs)
+                        running[future] = name
+                    if not running:
+                        raise ValueError(f"Unresolvable task dependencies: {sorted(pending)}")
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        self.timings[name] = time.perf_counter() - started[name]
+                        results[name] = future.result()
+        finally:
+            for handle in shared.values():
+                handle.unlink()
+        return results
+
+    def map(self, fn, items):
+        """Apply ``fn`` to every item on a thread pool, preserving order.
+
+        Meant for per-column numpy/pandas work, which releases the GIL.
+        """
+        items = list(items)
+        if self.workers <= 1 or len(items) <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(fn, items))
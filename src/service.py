@@ -0,0 +1,390 @@
+"""Local JSON service keeping datasets warm for repeated risk and utility queries.
+
+    python main.py serve [--host HOST] [--port PORT]
+
+Endpoints (request and response bodies are JSON):
+
+    GET    /health              status and loaded datasets
+    GET    /datasets            loaded and known datasets
+    POST   /datasets            {"name", "path", "ground_truth"?} register and load a dataset
+    DELETE /datasets/NAME       unload a dataset
+    POST   /risk                {"dataset", "quasi_identifiers"?, "sensitive_attributes"?,
+                                 "k"?, "l"?, "t"?, "metrics"?} risk metrics
+    POST   /utility             {"dataset", "protected", "ml"?} utility of one dataset against another
+
+``input`` and ``output`` name the configured input and output files and
+are loaded on first use. The service reads any file path it is given, so
+it binds to localhost unless configured otherwise.
+"""
+import copy
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from src.risk_assessment import RiskAssessor
+from src.data_io import read_table
+from src.profiling import record_error
+
+RISK_METRICS = ['k_anonymity', 'prosecutor_risk', 'journalist_risk', 'l_diversity', 't_closeness',
+                'linkage_attack']
+
+
+class LoadedDataset:
+    """One dataset held in memory with the assessors and results built on it"""
+
+    def __init__(self, name, path, data, ground_truth=None):
+        self.name = name
+        self.path = path
+        self.data = data
+        self.ground_truth = ground_truth
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.lock = threading.Lock()
+        # Utility queries take seconds; they must not hold up risk queries on self.lock
+        self.utility_lock = threading.Lock()
+        self.assessors = {}
+        self.measurer = None
+        # Protected dataset name -> (its loaded_at, result); a reload replaces the entry
+        self.utility_results = {}
+        self.frame_bytes = int(data.memory_usage(deep=True).sum())
+        if ground_truth is not None:
+            self.frame_bytes += int(ground_truth.memory_usage(deep=True).sum())
+
+    @property
+    def memory_bytes(self):
+        # Every cached QI index holds an int64 class code per row
+        return self.frame_bytes + 8 * len(self.data) * len(self.assessors)
+
+    def describe(self):
+        return {
+            'name': self.name,
+            'path': self.path,
+            'rows': len(self.data),
+            'columns': list(map(str, self.data.columns)),
+            'memory_mb': self.memory_bytes / 1024 ** 2,
+            'cached_indexes': len(self.assessors),
+            'idle_seconds': time.time() - self.last_used,
+        }
+
+
+class DatasetRegistry:
+    """Loaded datasets, evicted least recently used first to stay within a memory budget.
+
+    Datasets idle for longer than ``idle_timeout`` seconds are unloaded as
+    well. A dataset that was evicted but is still known by name is loaded
+    again on its next use.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        settings = config.get('service') or {}
+        self.memory_budget = int(settings.get('memory_budget_mb', 2048) * 1024 ** 2)
+        self.idle_timeout = settings.get('idle_timeout', 1800)
+        data_settings = config['data_settings']
+        # name -> (path, ground truth path, format)
+        self.sources = {
+            'input': (data_settings['input_file'], data_settings.get('ground_truth_file'),
+                      data_settings.get('input_format')),
+            'output': (data_settings['output_file'], None, data_settings.get('output_format')),
+        }
+        self.datasets = OrderedDict()
+        self.lock = threading.Lock()
+        self._loading = {}
+
+    def _read(self, path, fmt=None):
+        settings = self.config['data_settings']
+        return read_table(path, fmt, dtypes=settings.get('dtypes'), memory_map=settings.get('memory_map', True))
+
+    def register(self, name, path, ground_truth=None):
+        """Remember where ``name`` is read from and load it (again)"""
+        with self.lock:
+            self.sources[name] = (path, ground_truth, None)
+            self.datasets.pop(name, None)
+        return self.get(name)
+
+    def get(self, name):
+        """The loaded dataset ``name``, loading it first if needed"""
+        with self.lock:
+            dataset = self.datasets.get(name)
+            if dataset is not None:
+                self.datasets.move_to_end(name)
+                dataset.last_used = time.time()
+                return dataset
+            if name not in self.sources:
+                raise KeyError(f"Unknown dataset '{name}'")
+            # One load per name; concurrent requests wait for it
+            loading = self._loading.setdefault(name, threading.Lock())
+
+        with loading:
+            with self.lock:
+                dataset = self.datasets.get(name)
+                if dataset is not None:
+                    # Loaded by the request this one waited for
+                    dataset.last_used = time.time()
+                    return dataset
+                path, ground_truth_path, fmt = self.sources[name]
+            data = self._read(path, fmt)
+            ground_truth = self._read(ground_truth_path) if ground_truth_path else None
+            dataset = LoadedDataset(name, path, data, ground_truth)
+            with self.lock:
+                self.datasets[name] = dataset
+                self._loading.pop(name, None)
+            self.evict()
+            return dataset
+
+    def unload(self, name):
+        with self.lock:
+            if self.datasets.pop(name, None) is None:
+                raise KeyError(f"Dataset '{name}' is not loaded")
+
+    def evict(self):
+        """Unload idle datasets, then the least recently used ones while over budget"""
+        now = time.time()
+        with self.lock:
+            for name in [name for name, dataset in self.datasets.items()
+                         if now - dataset.last_used > self.idle_timeout]:
+                del self.datasets[name]
+            # The most recently used dataset stays even if it alone exceeds the budget
+            while len(self.datasets) > 1 and sum(d.memory_bytes for d in self.datasets.values()) > self.memory_budget:
+                self.datasets.popitem(last=False)
+
+    def describe(self):
+        with self.lock:
+            loaded = [dataset.describe() for dataset in self.datasets.values()]
+            known = sorted(self.sources)
+        return {
+            'loaded': loaded,
+            'known': known,
+            'memory_mb': sum(dataset['memory_mb'] for dataset in loaded),
+            'memory_budget_mb': self.memory_budget / 1024 ** 2,
+        }
+
+
+class SafeDataService:
+    """Risk and utility queries against warm datasets.
+
+    RiskAssessors are cached per dataset and (QIs, sensitive attributes),
+    so their equivalence-class index and l-diversity/t-closeness metrics
+    are built once; thresholds only change the summaries and are applied
+    to a view of the cached assessor. Utility results are cached per pair
+    of loaded datasets.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.registry = DatasetRegistry(config)
+
+    def _request_config(self, quasi_identifiers, sensitive_attributes, k=None, l=None, t=None):
+        config = copy.deepcopy(self.config)
+        config['risk_settings']['quasi_identifiers'] = list(quasi_identifiers)
+        config['risk_settings']['sensitive_attributes'] = list(sensitive_attributes)
+        if k is not None:
+            config['privacy']['k_anonymity']['k_value'] = int(k)
+        if l is not None:
+            config['risk_settings']['l_value'] = int(l)
+        if t is not None:
+            config['risk_settings']['t_value'] = float(t)
+        return config
+
+    def _assessor(self, dataset, quasi_identifiers, sensitive_attributes, metrics):
+        key = (tuple(quasi_identifiers), tuple(sensitive_attributes))
+        with dataset.lock:
+            assessor = dataset.assessors.get(key)
+            if assessor is None:
+                assessor = RiskAssessor(self._request_config(quasi_identifiers, sensitive_attributes))
+                assessor.data = dataset.data
+                if dataset.ground_truth is not None:
+                    assessor.ground_truth = dataset.ground_truth
+                assessor.qi_index()
+                dataset.assessors[key] = assessor
+            if {'l_diversity', 't_closeness'} & set(metrics) and assessor.diversity_result is None:
+                assessor.sensitive_attribute_metrics()
+        self.registry.evict()
+        return assessor
+
+    def risk(self, request):
+        dataset = self.registry.get(request.get('dataset', 'input'))
+        risk_settings = self.config['risk_settings']
+        quasi_identifiers = request.get('quasi_identifiers') or risk_settings['quasi_identifiers']
+        sensitive_attributes = request.get('sensitive_attributes', risk_settings.get('sensitive_attributes', []))
+        missing = [col for col in list(quasi_identifiers) + list(sensitive_attributes)
+                   if col not in dataset.data.columns]
+        if missing:
+            raise ValueError(f"Columns not in dataset '{dataset.name}': {', '.join(missing)}")
+        metrics = request.get('metrics') or RISK_METRICS[:-1]
+        unknown = [metric for metric in metrics if metric not in RISK_METRICS]
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(unknown)}; expected some of {', '.join(RISK_METRICS)}")
+
+        base = self._assessor(dataset, quasi_identifiers, sensitive_attributes, metrics)
+        assessor = base.with_config(self._request_config(
+            quasi_identifiers, sensitive_attributes, request.get('k'), request.get('l'), request.get('t')))
+        k_anonymity = assessor.calculate_k_anonymity()
+        compute = {
+            'k_anonymity': lambda: k_anonymity,
+            'prosecutor_risk': lambda: assessor.assess_prosecutor_risk(k_anonymity[0]),
+            'journalist_risk': lambda: assessor.assess_journalist_risk(k_anonymity[0]),
+            'l_diversity': assessor.assess_l_diversity,
+            't_closeness': assessor.assess_t_closeness,
+            'linkage_attack': assessor.simulate_linkage_attack,
+        }
+        return {metric: compute[metric]() for metric in metrics}
+
+    def utility(self, request):
+        from src.utility_measurement import UtilityMeasurer
+
+        original = self.registry.get(request.get('dataset', 'input'))
+        protected = self.registry.get(request.get('protected', 'output'))
+        ml = bool(request.get('ml', False))
+        with original.utility_lock:
+            if original.measurer is None:
+                original.measurer = UtilityMeasurer(self.config)
+            measurer = original.measurer
+            # One entry per protected dataset, measured again once the file is reloaded
+            loaded_at, result = original.utility_results.get(protected.name, (None, None))
+            if loaded_at != protected.loaded_at:
+                sketches = measurer.sketch_pair(original.data, protected.data)
+                result = {
+                    'statistical_similarity': measurer.measure_statistical_similarity(
+                        original.data, protected.data, sketches),
+                    'correlation_matrix': measurer.compare_correlations(sketches[0], sketches[1]),
+                }
+                original.utility_results[protected.name] = (protected.loaded_at, result)
+            if ml and 'ml_utility' not in result:
+                result['ml_utility'] = measurer.measure_ml_utility(original.data, protected.data)
+        if not ml:
+            result = {key: value for key, value in result.items() if key != 'ml_utility'}
+        return result
+
+    def datasets(self, request=None):
+        return self.registry.describe()
+
+    def load(self, request):
+        if not request.get('name') or not request.get('path'):
+            raise ValueError("'name' and 'path' are required")
+        return self.registry.register(request['name'], request['path'], request.get('ground_truth')).describe()
+
+
+def _json_default(value):
+    # numpy scalars -> Python numbers; anything else unserializable -> str
+    return _json_safe(value.item()) if hasattr(value, 'item') else str(value)
+
+
+def _json_safe(value):
+    """``value`` with NaN and infinities as None, which JSON has no literal for"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """Route JSON requests to the server's SafeDataService"""
+
+    def _send(self, status, body):
+        payload = json.dumps(_json_safe(body), default=_json_default, allow_nan=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        body = json.loads(self.rfile.read(length))
+        if not isinstance(body, dict):
+            raise ValueError("Request body must be a JSON object")
+        return body
+
+    def _handle(self, method):
+        service = self.server.service
+        routes = {
+            ('GET', '/health'): lambda body: {'status': 'ok', 'datasets': len(service.registry.datasets)},
+            ('GET', '/datasets'): service.datasets,
+            ('POST', '/datasets'): service.load,
+            ('POST', '/risk'): service.risk,
+            ('POST', '/utility'): service.utility,
+        }
+        path = self.path.split('?', 1)[0].rstrip('/') or '/'
+        start = time.perf_counter()
+        try:
+            if method == 'DELETE' and path.startswith('/datasets/'):
+                service.registry.unload(path[len('/datasets/'):])
+                result = {'unloaded': path[len('/datasets/'):]}
+            elif (method, path) in routes:
+                result = routes[(method, path)](self._body())
+            else:
+                self._send(404, {'error': f"No route for {method} {path}"})
+                return
+        except (KeyError, FileNotFoundError) as e:
+            self._send(404, {'error': str(e.args[0]) if isinstance(e, KeyError) and e.args else str(e)})
+            return
+        except ValueError as e:
+            self._send(400, {'error': str(e)})
+            return
+        except Exception as e:
+            record_error(f"service {method} {path}", e)
+            self._send(500, {'error': f"{type(e).__name__}: {e}"})
+            return
+        self._send(200, {'result': result, 'elapsed_ms': (time.perf_counter() - start) * 1000})
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer answering requests on a fixed-size thread pool"""
+
+    def __init__(self, address, handler, service, workers=4):
+        super().__init__(address, handler)
+        self.service = service
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+def create_server(config, host=None, port=None):
+    """Service and HTTP server for ``config``; the caller runs ``serve_forever``"""
+    settings = config.get('service') or {}
+    service = SafeDataService(config)
+    server = PooledHTTPServer((host or settings.get('host', '127.0.0.1'), port or settings.get('port', 8765)),
+                              ServiceRequestHandler, service, settings.get('workers', 4))
+
+    # Unload idle datasets even when no requests arrive
+    def sweep():
+        while True:
+            time.sleep(max(service.registry.idle_timeout / 4, 1))
+            service.registry.evict()
+    threading.Thread(target=sweep, daemon=True).start()
+
+    for name in settings.get('preload') or []:
+        service.registry.get(name)
+    return server
@@ -0,0 +1,344 @@
+import numpy as np
+import pandas as pd
+
+
+class RunningStats:
+    """Mergeable count, sum, sum of squares, min and max of one column"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.count += len(values)
+        self.total += values.sum()
+        self.total_sq += np.square(values).sum()
+        self.minimum = min(self.minimum, values.min())
+        self.maximum = max(self.maximum, values.max())
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    @property
+    def variance(self):
+        if self.count < 2:
+            return np.nan
+        return max(self.total_sq - self.count * self.mean ** 2, 0.0) / (self.count - 1)
+
+
+class PairedStats:
+    """Mergeable co-moments of two aligned columns, for Pearson correlation"""
+
+    def __init__(self):
+        self.count = 0
+        self.sum_x = self.sum_y = 0.0
+        self.sum_xx = self.sum_yy = self.sum_xy = 0.0
+
+    def update(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[valid], y[valid]
+        self.count += len(x)
+        self.sum_x += x.sum()
+        self.sum_y += y.sum()
+        self.sum_xx += np.dot(x, x)
+        self.sum_yy += np.dot(y, y)
+        self.sum_xy += np.dot(x, y)
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.sum_x += other.sum_x
+        self.sum_y += other.sum_y
+        self.sum_xx += other.sum_xx
+        self.sum_yy += other.sum_yy
+        self.sum_xy += other.sum_xy
+        return self
+
+    @property
+    def correlation(self):
+        if self.count < 2:
+            return 0
+        cov = self.sum_xy - self.sum_x * self.sum_y / self.count
+        var_x = self.sum_xx - self.sum_x ** 2 / self.count
+        var_y = self.sum_yy - self.sum_y ** 2 / self.count
+        if var_x <= 0 or var_y <= 0:
+            return 0
+        return cov / np.sqrt(var_x * var_y)
+
+
+class KLLSketch:
+    """Mergeable KLL quantile sketch of one numeric column.
+
+    Items live in levels of compactors; an item at level h stands for 2^h
+    values. When a level outgrows its capacity it is sorted and every other
+    item (from a random offset) is promoted, so the sketch keeps O(k) items
+    and rank queries are accurate to roughly 1/k of the count. Updates take
+    whole arrays, and two sketches merge by concatenating their levels.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+        self._sorted = None
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # Compact the smallest items in pairs and leave the level half
+                # full; an even number is compacted so the total weight is kept
+                compacted = (len(items) - self._capacity(level) // 2) // 2 * 2
+                keep = items[compacted:]
+                pairs = items[:compacted]
+                promoted = pairs[self.rng.integers(0, 2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+        self._sorted = None
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def weighted_items(self):
+        """Sorted items and their cumulative weight fractions"""
+        if self._sorted is None:
+            values = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(len(items), 2.0 ** level)
+                                      for level, items in enumerate(self.levels)])
+            order = np.argsort(values, kind='stable')
+            cumulative = np.cumsum(weights[order])
+            self._sorted = (values[order], cumulative / cumulative[-1] if len(cumulative) else cumulative)
+        return self._sorted
+
+    def cdf(self, points):
+        """Estimated fraction of values <= each point"""
+        values, cumulative = self.weighted_items()
+        positions = np.searchsorted(values, points, side='right')
+        return np.where(positions > 0, cumulative[np.maximum(positions - 1, 0)], 0.0) if len(values) \
+            else np.full(len(np.atleast_1d(points)), np.nan)
+
+    def quantiles(self, probs):
+        values, cumulative = self.weighted_items()
+        if len(values) == 0:
+            return np.full(len(np.atleast_1d(probs)), np.nan)
+        positions = np.searchsorted(cumulative, probs, side='left')
+        return values[np.minimum(positions, len(values) - 1)]
+
+
+class CountTable:
+    """Mergeable value counts of one categorical column (missing values counted too)"""
+
+    MISSING = '<missing>'
+
+    def __init__(self):
+        self.counts = pd.Series(dtype=float)
+
+    def update(self, values):
+        counts = pd.Series(values).value_counts(dropna=False)
+        counts.index = pd.Index(counts.index.astype(object)).fillna(self.MISSING)
+        counts = counts.groupby(level=0).sum()
+        self.counts = counts.astype(float) if self.counts.empty else self.counts.add(counts, fill_value=0)
+        return self
+
+    def merge(self, other):
+        if self.counts.empty:
+            self.counts = other.counts.copy()
+        elif not other.counts.empty:
+            self.counts = self.counts.add(other.counts, fill_value=0)
+        return self
+
+    def distribution(self):
+        total = self.counts.sum()
+        return self.counts / total if total else self.counts
+
+
+class CovarianceSketch:
+    """Mergeable pairwise co-moments of several numeric columns.
+
+    Pairs are accumulated over the rows where both columns are present, as
+    a handful of matrix products per update.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        size = len(self.columns)
+        self.count = np.zeros((size, size))
+        self.sums = np.zeros((size, size))      # sum of column i where j is present
+        self.squares = np.zeros((size, size))   # sum of column i squared where j is present
+        self.products = np.zeros((size, size))
+
+    def update(self, frame):
+        values = np.column_stack([pd.to_numeric(frame[col], errors='coerce').to_numpy(dtype=float)
+                                  for col in self.columns]) if self.columns else np.zeros((len(frame), 0))
+        present = ~np.isnan(values)
+        values = np.where(present, values, 0.0)
+        present = present.astype(float)
+        self.count += present.T @ present
+        self.sums += values.T @ present
+        self.squares += np.square(values).T @ present
+        self.products += values.T @ values
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.sums += other.sums
+        self.squares += other.squares
+        self.products += other.products
+        return self
+
+    def correlation(self):
+        """Pearson correlation matrix as a DataFrame (NaN where undefined)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            n = self.count
+            covariance = n * self.products - self.sums * self.sums.T
+            variance_i = n * self.squares - self.sums ** 2
+            variance_j = variance_i.T
+            correlation = covariance / np.sqrt(variance_i * variance_j)
+        correlation[(variance_i <= 0) | (variance_j <= 0)] = np.nan
+        return pd.DataFrame(correlation, index=self.columns, columns=self.columns)
+
+
+class DatasetSketch:
+    """Mergeable summary of a dataset: per-column moments and KLL quantiles for
+    numeric columns, count tables for categorical columns and the pairwise
+    co-moments of the numeric columns.
+    """
+
+    def __init__(self, numeric, categorical, k=200, seed=None):
+        self.numeric = list(numeric)
+        self.categorical = list(categorical)
+        self.rows = 0
+        self.stats = {col: RunningStats() for col in self.numeric}
+        self.quantiles = {col: KLLSketch(k, seed) for col in self.numeric}
+        self.counts = {col: CountTable() for col in self.categorical}
+        self.covariance = CovarianceSketch(self.numeric)
+
+    def update(self, frame):
+        self.rows += len(frame)
+        for col in self.numeric:
+            values = pd.to_numeric(frame[col], errors='coerce').to_numpy(dtype=float) \
+                if col in frame.columns else np.full(len(frame), np.nan)
+            self.stats[col].update(values)
+            self.quantiles[col].update(values)
+        for col in self.categorical:
+            if col in frame.columns:
+                self.counts[col].update(frame[col])
+        self.covariance.update(frame.reindex(columns=self.numeric))
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        for col in self.numeric:
+            self.stats[col].merge(other.stats[col])
+            self.quantiles[col].merge(other.quantiles[col])
+        for col in self.categorical:
+            self.counts[col].merge(other.counts[col])
+        self.covariance.merge(other.covariance)
+        return self
+
+    @classmethod
+    def from_frame(cls, frame, numeric, categorical, k=200, seed=None, chunk_size=None, scheduler=None):
+        """Sketch ``frame`` in chunks (on the scheduler's pool, if given) and merge
+
+        Each chunk's sketch gets its own child of ``seed``, so the chunks
+        make independent random choices.
+        """
+        chunk_size = chunk_size or max(len(frame), 1)
+        starts = range(0, max(len(frame), 1), chunk_size)
+        seeds = np.random.SeedSequence(seed).spawn(len(starts))
+        build = lambda i: cls(numeric, categorical, k, seeds[i]).update(frame.iloc[starts[i]:starts[i] + chunk_size])
+        parts = scheduler.map(build, range(len(starts))) if scheduler is not None else [build(i) for i in range(len(starts))]
+        sketch = parts[0]
+        for part in parts[1:]:
+            sketch.merge(part)
+        return sketch
+
+
+def _union_points(a, b):
+    return np.union1d(a.weighted_items()[0], b.weighted_items()[0])
+
+
+def ks_statistic(a, b):
+    """Kolmogorov-Smirnov distance between two quantile sketches"""
+    if a.n == 0 or b.n == 0:
+        return np.nan
+    points = _union_points(a, b)
+    return float(np.max(np.abs(a.cdf(points) - b.cdf(points))))
+
+
+def wasserstein_distance(a, b):
+    """First Wasserstein distance between two quantile sketches"""
+    if a.n == 0 or b.n == 0:
+        return np.nan
+    points = _union_points(a, b)
+    # Both CDFs are step functions, constant between consecutive points
+    gaps = np.abs(a.cdf(points[:-1]) - b.cdf(points[:-1]))
+    return float(np.sum(gaps * np.diff(points)))
+
+
+def total_variation(a, b):
+    """Total variation distance between two count tables"""
+    p, q = a.distribution(), b.distribution()
+    if p.empty or q.empty:
+        return np.nan
+    p, q = p.align(q, fill_value=0)
+    return float(0.5 * np.abs(p - q).sum())
+
+
+def correlation_difference(a, b):
+    """Summary of the difference between two correlation matrices"""
+    diff = (a.correlation() - b.correlation()).abs()
+    off_diagonal = diff.where(~np.eye(len(diff), dtype=bool)).stack().dropna()
+    if off_diagonal.empty:
+        return {'max_abs_difference': np.nan, 'mean_abs_difference': np.nan, 'worst_pair': None}
+    worst = off_diagonal.idxmax()
+    return {
+        'max_abs_difference': float(off_diagonal.max()),
+        'mean_abs_difference': float(off_diagonal.mean()),
+        'worst_pair': list(worst),
+    }
@@ -0,0 +1,202 @@
+import numpy as np
+import pandas as pd
+
+from src.risk_assessment import RiskAssessor
+from src.privacy_enhancement import PrivacyEnhancer
+from src.utility_measurement import UtilityMeasurer
+from src.linkage import LinkageEngine
+from src.data_io import iter_table, projected_columns, schema, TableWriter
+from src.profiling import record_error
+from src.sketches import PairedStats
+
+
+class StreamingPipeline:
+    """Run the SafeData pipeline over a CSV file in fixed-size chunks.
+
+    Each chunk is generalized, noised and appended to the output file before
+    the next one is read. Only mergeable summaries are kept across chunks:
+    QI group counts for the risk metrics, a dataset sketch (moments, KLL
+    quantiles, count tables, co-moments) of the input and of the output for
+    the similarity metrics and plots, and a fixed-size uniform sample of
+    (original, protected) row pairs for the ML utility. Peak memory
+    is therefore bounded by the chunk size, the sample size and the number of
+    distinct QI groups, not by the number of rows.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        settings = config.get('processing') or {}
+        self.chunk_size = settings.get('chunk_size', 100000)
+        self.sample_size = settings.get('sample_size', 10000)
+        self.quasi_identifiers = config['risk_settings']['quasi_identifiers']
+        self.rng = np.random.default_rng(settings.get('seed'))
+
+    def iter_chunks(self, path):
+        """Yield the input file as DataFrames of at most ``chunk_size`` rows"""
+        settings = self.config['data_settings']
+        columns = None
+        if settings.get('project_columns'):
+            columns = projected_columns(path, self.config, settings.get('input_format'))
+        yield from iter_table(path, self.chunk_size, settings.get('input_format'),
+                              columns=columns, dtypes=settings.get('dtypes'))
+
+    def linkage_candidates(self, linkage, input_file, ground_truth_file):
+        """Linkage candidates of the ground truth, collapsed once and read in chunks.
+
+        Built on the join keys the input and the ground truth share; None
+        when they share none.
+        """
+        input_format = self.config['data_settings'].get('input_format')
+        keys = [key for key in linkage.join_keys
+                if key in schema(input_file, input_format) and key in schema(ground_truth_file)]
+        if not keys:
+            return None
+        return linkage.auxiliary_classes(iter_table(ground_truth_file, self.chunk_size, columns=keys), keys)
+
+    def noise_ranges(self, path):
+        """(min, max) of every numeric column over the whole input, or None without DP.
+
+        One pass before the release, so the noise scale of every chunk
+        comes from the same range rather than from the chunk's own.
+        """
+        if not self.config['privacy']['differential_privacy']['enabled']:
+            return None
+        ranges = {}
+        for chunk in self.iter_chunks(path):
+            numeric = chunk.select_dtypes(include=[np.number])
+            for col, low, high in zip(numeric.columns, numeric.min(), numeric.max()):
+                old_low, old_high = ranges.get(col, (np.nan, np.nan))
+                ranges[col] = (np.fmin(old_low, low), np.fmax(old_high, high))
+        return ranges
+
+    def protect_chunk(self, enhancer, chunk, index=0, ranges=None):
+        """Apply the row-wise privacy techniques to a single chunk.
+
+        Each chunk draws noise from its own stream of the configured seed,
+        scaled by the input's ``noise_ranges``; the chunks are disjoint, so
+        the release is charged to the privacy budget only once. Synthetic data generation needs the whole dataset
+        and is not applied in streaming mode.
+        """
+        privacy = self.config['privacy']
+        result = chunk
+        generalized = []
+        if privacy['k_anonymity']['enabled']:
+            result = enhancer.apply_k_anonymity(result, privacy['k_anonymity']['k_value'])
+            generalized = enhancer.k_anonymity_summary['quasi_identifiers']
+        if privacy['differential_privacy']['enabled']:
+            result = enhancer.apply_differential_privacy(
+                result, privacy['differential_privacy']['epsilon'],
+                stream=index, charge=index == 0, inplace=result is not chunk, exclude=generalized,
+                ranges=ranges if ranges is not None else {}
+            )
+        return result
+
+    def _update_sample(self, sample, original, protected):
+        """Bottom-k sampling on random priorities, mergeable across chunks"""
+        pairs = pd.concat(
+            [original.add_prefix('orig__'), protected.add_prefix('prot__')],
+            axis=1,
+        )
+        pairs['_priority'] = self.rng.random(len(pairs))
+        if sample is not None:
+            pairs = pd.concat([sample, pairs], ignore_index=True)
+        return pairs.nsmallest(self.sample_size, '_priority')
+
+    def _split_sample(self, sample):
+        original = sample.filter(regex='^orig__').rename(columns=lambda c: c[len('orig__'):])
+        protected = sample.filter(regex='^prot__').rename(columns=lambda c: c[len('prot__'):])
+        return original.reset_index(drop=True), protected.reset_index(drop=True)
+
+    def run(self, input_file, output_file, ground_truth_file=None):
+        """Stream ``input_file`` through the pipeline, writing ``output_file``.
+
+        Returns ``(risk_report, utility_report)`` in the same shape as the
+        in-memory pipeline produces.
+        """
+        assessor = RiskAssessor(self.config)
+        enhancer = PrivacyEnhancer(self.config)
+        linkage = LinkageEngine(self.config)
+        candidates = None
+        if ground_truth_file:
+            candidates = self.linkage_candidates(linkage, input_file, ground_truth_file)
+        writer = TableWriter(output_file, self.config['data_settings'].get('output_format'))
+
+        group_counts = None
+        total_rows = 0
+        linked = 0
+        measurer = UtilityMeasurer(self.config)
+        original_sketch = None
+        protected_sketch = None
+        paired_stats = {}
+        sample = None
+        ranges = self.noise_ranges(input_file)
+
+        for index, chunk in enumerate(self.iter_chunks(input_file)):
+            total_rows += len(chunk)
+
+            available_qi = [qi for qi in self.quasi_identifiers if qi in chunk.columns]
+            if available_qi:
+                counts = chunk.groupby(available_qi, observed=True).size()
+                group_counts = counts if group_counts is None else group_counts.add(counts, fill_value=0)
+
+            if candidates is not None:
+                linked += linkage.link(chunk, candidates=candidates)['matches']
+
+            protected = self.protect_chunk(enhancer, chunk, index, ranges)
+            writer.write(protected)
+
+            # Column types are fixed by the first chunk; a later chunk may
+            # parse an all-missing text column as float
+            if original_sketch is None:
+                numeric, categorical = measurer.similarity_columns(chunk, protected)
+                original_sketch = measurer.new_sketch(numeric, categorical)
+                protected_sketch = measurer.new_sketch(numeric, categorical)
+            original_sketch.update(chunk)
+            protected_sketch.update(protected)
+            for col in original_sketch.numeric:
+                paired_stats.setdefault(col, PairedStats()).update(
+                    chunk[col], pd.to_numeric(protected[col], errors='coerce'))
+
+            sample = self._update_sample(sample, chunk, protected)
+
+        writer.close()
+
+        if group_counts is None:
+            k_anonymity = (float('inf'), "No quasi-identifiers found")
+        else:
+            k_anonymity = assessor.summarize_group_sizes(group_counts.astype(np.int64))
+
+        if not ground_truth_file:
+            linkage_attack = (0, "No ground truth data available")
+        elif candidates is None:
+            linkage_attack = (0, "No common join keys between data and ground truth")
+        else:
+            success_rate = (linked / total_rows) * 100 if total_rows > 0 else 0
+            linkage_attack = (success_rate, f"Linked {linked}/{total_rows} records ({success_rate:.1f}%)")
+
+        k_value = k_anonymity[0]
+        risk_report = {
+            'k_anonymity': k_anonymity,
+            'linkage_attack': linkage_attack,
+            'prosecutor_risk': assessor.assess_prosecutor_risk(k_value),
+            'journalist_risk': assessor.assess_journalist_risk(k_value, total_rows),
+        }
+
+        utility_report = {'statistical_similarity': {}, 'correlation_matrix': None, 'plots': {}}
+        if original_sketch is not None:
+            utility_report['statistical_similarity'] = measurer.compare_sketches(
+                original_sketch, protected_sketch, paired_stats)
+            utility_report['correlation_matrix'] = measurer.compare_correlations(original_sketch, protected_sketch)
+            if measurer.plots_enabled():
+                try:
+                    utility_report['plots'] = measurer.create_comparison_plots(original_sketch, protected_sketch)
+                except Exception as e:
+                    print(f"Plot creation failed: {e}")
+                    record_error('UtilityMeasurer.create_comparison_plots', e)
+        if sample is not None:
+            sample_original, sample_protected = self._split_sample(sample)
+            utility_report['ml_utility'] = measurer.measure_ml_utility(sample_original, sample_protected)
+        else:
+            utility_report['ml_utility'] = measurer.measure_ml_utility(pd.DataFrame(), pd.DataFrame())
+
+        return risk_report, utility_report
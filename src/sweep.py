@@ -0,0 +1,140 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from src.risk_assessment import RiskAssessor
+from src.privacy_enhancement import PrivacyEnhancer
+from src.utility_measurement import UtilityMeasurer
+from src.differential_privacy import PrivacyBudgetAccountant
+from src.scheduler import TaskScheduler
+
+
+def _generalize(config, data, k):
+    pe = PrivacyEnhancer(config)
+    generalized = pe.apply_k_anonymity(data, k)
+    return generalized, pe.k_anonymity_summary
+
+
+def pareto_frontier(results, minimize=('prosecutor_risk', 'epsilon_spent'), maximize=('utility',)):
+    """Flags for the rows of ``results`` that no other row dominates"""
+    if len(results) == 0:
+        return np.zeros(0, dtype=bool)
+    # Orient every objective so that smaller is better
+    points = np.column_stack([results[col].to_numpy(dtype=float) for col in minimize]
+                             + [-results[col].to_numpy(dtype=float) for col in maximize])
+    no_worse = (points[:, None, :] >= points[None, :, :]).all(axis=2)
+    better = (points[:, None, :] > points[None, :, :]).any(axis=2)
+    return ~(no_worse & better).any(axis=1)
+
+
+class ParameterSweep:
+    """Evaluate many privacy configurations against one loaded dataset.
+
+    The grid is the product of ``k_values``, ``epsilons`` and the technique
+    toggles in the ``sweep`` config section; parameters of a disabled
+    technique are not expanded. Each k is generalized once and shared by
+    every epsilon, the risk of the original data is indexed once, and one
+    UtilityMeasurer keeps the original-data statistics and baseline model
+    for all configurations. Configurations run on the TaskScheduler.
+
+    Candidate releases are not charged to the configured budget ledger;
+    ``epsilon_spent`` is what the configuration would spend if released.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        settings = config.get('sweep') or {}
+        privacy = config['privacy']
+        self.k_values = settings.get('k_values') or [privacy['k_anonymity']['k_value']]
+        self.epsilons = settings.get('epsilons') or [privacy['differential_privacy']['epsilon']]
+        techniques = settings.get('techniques') or {}
+        self.techniques = {
+            name: techniques.get(name, [privacy[name]['enabled']])
+            for name in ('k_anonymity', 'differential_privacy', 'synthetic_data')
+        }
+        self.output_file = settings.get('output_file')
+
+    def configurations(self):
+        """The distinct configurations of the grid"""
+        configurations = []
+        toggles = itertools.product(*self.techniques.values())
+        for k_anonymity, differential_privacy, synthetic_data in toggles:
+            if synthetic_data:
+                # Synthetic data replaces the release, so k and epsilon do not apply
+                k_values, epsilons = [None], [None]
+            else:
+                k_values = self.k_values if k_anonymity else [None]
+                epsilons = self.epsilons if differential_privacy else [None]
+            for k, epsilon in itertools.product(k_values, epsilons):
+                configuration = {'k_value': k, 'epsilon': epsilon, 'synthetic_data': bool(synthetic_data)}
+                if configuration not in configurations:
+                    configurations.append(configuration)
+        return configurations
+
+    def _evaluate(self, configuration, data, generalized, measurer):
+        pe = PrivacyEnhancer(self.config)
+        pe.accountant = PrivacyBudgetAccountant()
+        if configuration['synthetic_data']:
+            num_records = self.config['privacy']['synthetic_data']['num_records']
+            protected = pe.generate_synthetic_data(data, num_records)
+        else:
+            protected = data
+            exclude = []
+            if generalized is not None:
+                protected, summary = generalized
+                exclude = summary['quasi_identifiers']
+            if configuration['epsilon'] is not None:
+                protected = pe.apply_differential_privacy(protected, configuration['epsilon'], exclude=exclude)
+
+        # The risk of the frame that would be released, after any noise
+        achieved_k = self.original_k
+        if protected is not data:
+            achieved_k, _ = RiskAssessor(self.config).calculate_k_anonymity(protected)
+
+        similarity = measurer.measure_statistical_similarity(data, protected)
+        ml_utility = measurer.measure_ml_utility(data, protected)
+        mean_differences = [metrics['mean_difference'] for metrics in similarity.values()
+                            if metrics['kind'] == 'numeric']
+        return {
+            **configuration,
+            'achieved_k': achieved_k,
+            'prosecutor_risk': 1.0 / achieved_k if achieved_k > 0 else 1.0,
+            'epsilon_spent': pe.accountant.spent,
+            'utility': ml_utility['utility_retention'],
+            'accuracy_loss': ml_utility['accuracy_loss'],
+            'mean_difference': float(np.mean(mean_differences)) if mean_differences else 0.0,
+        }
+
+    def run(self, data):
+        """Evaluate every configuration and return one row per configuration.
+
+        ``achieved_k`` and ``prosecutor_risk`` are measured on each
+        configuration's released frame.
+
+        The ``pareto`` column marks the frontier of low prosecutor risk, low
+        epsilon spent and high utility (ML utility retention).
+        """
+        ra = RiskAssessor(self.config)
+        ra.data = data
+        self.original_k, _ = ra.calculate_k_anonymity()
+        measurer = UtilityMeasurer(self.config)
+        configurations = self.configurations()
+
+        scheduler = TaskScheduler(self.config)
+        generalized = {}
+        for k in dict.fromkeys(c['k_value'] for c in configurations if c['k_value'] is not None):
+            generalized[k] = scheduler.add(f"k_anonymity:k={k}", _generalize, self.config, data, k)
+        evaluations = []
+        for i, configuration in enumerate(configurations):
+            shared = generalized.get(configuration['k_value'])
+            evaluations.append(scheduler.add(f"configuration:{i}", self._evaluate,
+                                             configuration, data, shared, measurer))
+        outputs = scheduler.run()
+        self.timings = scheduler.timings
+
+        results = pd.DataFrame([outputs[task.name] for task in evaluations])
+        results['pareto'] = pareto_frontier(results)
+        if self.output_file:
+            results.to_csv(self.output_file, index=False)
+        return results
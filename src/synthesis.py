@@ -0,0 +1,186 @@
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+from src.data_io import TableWriter
+
+
+class GaussianCopulaSynthesizer:
+    """Synthesizer that preserves marginals and pairwise dependence.
+
+    Fitting learns a quantile table for every numeric column, a frequency
+    table for every categorical column (the ``max_categories`` most frequent
+    values) and the correlation matrix of the normal scores of all columns.
+    Sampling draws correlated normals in batches, maps them to uniforms and
+    inverts each marginal with a vectorized lookup, so memory depends on the
+    batch size only. An ``id`` column is regenerated as a sequence.
+    """
+
+    def __init__(self, max_categories=1000, n_quantiles=1001, max_fit_rows=1000000, seed=None):
+        self.max_categories = max_categories
+        self.n_quantiles = n_quantiles
+        self.max_fit_rows = max_fit_rows
+        self.seed = seed
+        self.fit_stats = {}
+        self.sample_stats = {}
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config['privacy']['synthetic_data']
+        return cls(
+            max_categories=settings.get('max_categories', 1000),
+            max_fit_rows=settings.get('max_fit_rows', 1000000),
+            seed=settings.get('seed'),
+        )
+
+    def _fit_numeric(self, values):
+        probs = np.linspace(0, 1, self.n_quantiles)
+        valid = ~np.isnan(values)
+        marginal = {
+            'kind': 'numeric',
+            'probs': probs,
+            'quantiles': np.quantile(values[valid], probs) if valid.any() else np.zeros(len(probs)),
+            'missing_rate': 1 - valid.mean() if len(values) else 0.0,
+        }
+        scores = np.zeros(len(values))
+        if valid.any():
+            ranks = pd.Series(values[valid]).rank(method='average').to_numpy()
+            scores[valid] = ndtri(ranks / (valid.sum() + 1))
+        return marginal, scores
+
+    def _fit_categorical(self, series):
+        counts = series.value_counts(dropna=False).iloc[:self.max_categories]
+        categories = counts.index
+        cumulative = np.cumsum(counts.to_numpy()) / counts.sum()
+        marginal = {
+            'kind': 'categorical',
+            'categories': pd.Index([value for value in categories if not pd.isna(value)]),
+            'cumulative': cumulative,
+        }
+        # Position in frequency order -> categorical code (-1 for missing)
+        marginal['codes'] = marginal['categories'].get_indexer(categories)
+        # Each category occupies an interval of the unit line; use its midpoint
+        codes = categories.get_indexer(series)
+        midpoints = cumulative - counts.to_numpy() / counts.sum() / 2
+        u = np.where(codes >= 0, midpoints[np.maximum(codes, 0)], 0.5)
+        return marginal, ndtri(np.clip(u, 1e-9, 1 - 1e-9))
+
+    def fit(self, data):
+        """Learn the marginals and the normal-score correlation of ``data``"""
+        start = time.perf_counter()
+        sample = data
+        if len(data) > self.max_fit_rows:
+            sample = data.sample(self.max_fit_rows, random_state=self.seed)
+
+        self.columns = list(data.columns)
+        self.dtypes = data.dtypes.to_dict()
+        self.marginals = {}
+        self.modelled = []
+        scores = []
+        for col in self.columns:
+            column = sample[col]
+            if col == 'id':
+                self.marginals[col] = {'kind': 'sequence'}
+                continue
+            if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+                marginal, column_scores = self._fit_numeric(column.to_numpy(dtype=float))
+                marginal['integer'] = column.dtype.kind in 'iu'
+            else:
+                marginal, column_scores = self._fit_categorical(column)
+            self.marginals[col] = marginal
+            self.modelled.append(col)
+            scores.append(column_scores)
+
+        if scores:
+            correlation = np.corrcoef(np.vstack(scores)) if len(scores) > 1 else np.ones((1, 1))
+            correlation = np.nan_to_num(correlation)
+            np.fill_diagonal(correlation, 1.0)
+            # Clip to the nearest positive definite matrix before factorizing
+            eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+            correlation = (eigenvectors * np.maximum(eigenvalues, 1e-6)) @ eigenvectors.T
+            self.cholesky = np.linalg.cholesky(correlation)
+        else:
+            self.cholesky = np.zeros((0, 0))
+
+        elapsed = time.perf_counter() - start
+        self.fit_stats = {
+            'rows': len(sample),
+            'seconds': elapsed,
+            'rows_per_second': len(sample) / elapsed if elapsed > 0 else float('inf'),
+        }
+        return self
+
+    def _sample_batch(self, size, rng, first_id):
+        normals = rng.standard_normal((size, len(self.modelled))) @ self.cholesky.T
+        uniforms = ndtr(normals)
+        columns = {}
+        for col in self.columns:
+            marginal = self.marginals[col]
+            if marginal['kind'] == 'sequence':
+                columns[col] = np.arange(first_id, first_id + size)
+                continue
+            u = uniforms[:, self.modelled.index(col)]
+            if marginal['kind'] == 'numeric':
+                values = np.interp(u, marginal['probs'], marginal['quantiles'])
+                if marginal['missing_rate'] > 0:
+                    values[rng.random(size) < marginal['missing_rate']] = np.nan
+                elif marginal['integer']:
+                    values = np.round(values).astype(self.dtypes[col])
+                columns[col] = values
+            else:
+                position = np.searchsorted(marginal['cumulative'], u * marginal['cumulative'][-1], side='right')
+                position = np.minimum(position, len(marginal['codes']) - 1)
+                columns[col] = pd.Categorical.from_codes(marginal['codes'][position], marginal['categories'])
+        return pd.DataFrame(columns, columns=self.columns)
+
+    def iter_batches(self, num_records, batch_size=100000):
+        """Yield ``num_records`` synthetic rows as DataFrames of ``batch_size`` rows"""
+        rng = np.random.default_rng(self.seed)
+        start = time.perf_counter()
+        produced = 0
+        while produced < num_records:
+            size = min(batch_size, num_records - produced)
+            yield self._sample_batch(size, rng, produced + 1)
+            produced += size
+        elapsed = time.perf_counter() - start
+        self.sample_stats = {
+            'rows': produced,
+            'seconds': elapsed,
+            'rows_per_second': produced / elapsed if elapsed > 0 else float('inf'),
+        }
+
+    def sample(self, num_records, batch_size=100000):
+        """Generate ``num_records`` synthetic rows as one DataFrame"""
+        batches = list(self.iter_batches(num_records, batch_size))
+        if not batches:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(batches, ignore_index=True)
+
+    def sample_to_file(self, num_records, path, batch_size=100000, fmt=None):
+        """Stream ``num_records`` synthetic rows to a file with flat memory use
+
+        Returns the first batch; the rows are independent draws, so it is a
+        uniform sample of the rows written.
+        """
+        first = None
+        with TableWriter(path, fmt) as writer:
+            for batch in self.iter_batches(num_records, batch_size):
+                writer.write(batch)
+                if first is None:
+                    first = batch
+            if first is None:
+                first = pd.DataFrame(columns=self.columns)
+                writer.write(first)
+        return first
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
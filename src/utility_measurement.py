@@ -1,136 +1,268 @@
 import pandas as pd
 import numpy as np
-from sklearn.metrics import mean_squared_error
-from scipy.stats import pearsonr
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from src.scheduler import TaskScheduler
+from src.cache import ArtifactCache, dataset_fingerprint, artifact_key
+from src.sketches import (DatasetSketch, PairedStats, ks_statistic, wasserstein_distance,
+                          total_variation, correlation_difference)
+from src.profiling import stage, record_error
 
 class UtilityMeasurer:
     def __init__(self, config):
         self.config = config
+        self.cache = ArtifactCache.from_config(config)
+        self._fingerprints = {}
+        self._artifacts = {}
+        self.plot_renderer = None
+
+    def _original_artifact(self, original, name, compute, **params):
+        """Compute an artifact of the original data, memoized by fingerprint
+
+        Artifacts are kept in memory for the lifetime of the measurer (so
+        repeated comparisons against the same original, as in a parameter
+        sweep, compute them once) and on disk when the cache is enabled.
+        """
+        entry = self._fingerprints.get(id(original))
+        if entry is None:
+            fingerprint = dataset_fingerprint(original) if self.cache is not None else str(id(original))
+            entry = self._fingerprints[id(original)] = (original, fingerprint)
+        key = artifact_key(entry[1], name, **params)
+        if key not in self._artifacts:
+            if self.cache is None:
+                self._artifacts[key] = compute()
+            else:
+                self._artifacts[key] = self.cache.get_or_compute(key, compute)
+        return self._artifacts[key]
+    
+    def plots_enabled(self):
+        return (self.config.get('output') or {}).get('show_plots', True)
+    
+    def similarity_columns(self, original, protected):
+        """Numeric columns and categorical QIs/sensitive attributes present in both datasets"""
+        risk = self.config['risk_settings']
+        candidates = set(risk['quasi_identifiers']) | set(risk.get('sensitive_attributes', []))
+        numeric = [col for col in original.select_dtypes(include=[np.number]).columns
+                   if col in protected.columns and col != 'id']
+        categorical = [col for col in original.columns
+                       if col in candidates and col not in numeric and col in protected.columns]
+        return numeric, categorical
+    
+    def new_sketch(self, numeric, categorical):
+        """Empty dataset sketch with the configured accuracy"""
+        settings = self.config.get('utility') or {}
+        return DatasetSketch(numeric, categorical, settings.get('sketch_k', 400), settings.get('random_state', 42))
+    
+    def sketch(self, data, numeric, categorical):
+        """Dataset sketch of ``data``, built chunk by chunk on the worker pool"""
+        settings = self.config.get('utility') or {}
+        return DatasetSketch.from_frame(
+            data, numeric, categorical, k=settings.get('sketch_k', 400), seed=settings.get('random_state', 42),
+            chunk_size=settings.get('sketch_chunk_size', 1000000), scheduler=TaskScheduler(self.config)
+        )
+    
+    def compare_sketches(self, original, protected, paired=None):
+        """Similarity metrics of two dataset sketches
         
-    def measure_statistical_similarity(self, original, protected):
-        """Measure statistical similarity between datasets"""
-        results = {}
+        Numeric columns get the relative mean difference, KS and Wasserstein
+        distances, and categorical columns the total variation distance, for
+        datasets of any length. ``paired`` holds PairedStats of row-aligned
+        data; without it the per-column correlation is NaN.
+        """
+        def compare(col):
+            # Mean difference
+            orig_mean = original.stats[col].mean
+            prot_mean = protected.stats[col].mean
+            mean_diff = abs(orig_mean - prot_mean) / orig_mean if orig_mean != 0 else 0
+            orig_std = np.sqrt(original.stats[col].variance)
+            wasserstein = wasserstein_distance(original.quantiles[col], protected.quantiles[col])
+            return {
+                'kind': 'numeric',
+                'mean_difference': mean_diff,
+                'correlation': paired[col].correlation if paired is not None else np.nan,
+                'original_mean': orig_mean,
+                'protected_mean': prot_mean,
+                'original_std': orig_std,
+                'protected_std': np.sqrt(protected.stats[col].variance),
+                'ks': ks_statistic(original.quantiles[col], protected.quantiles[col]),
+                'wasserstein': wasserstein,
+                'wasserstein_normalized': wasserstein / orig_std if orig_std > 0 else np.nan
+            }
         
-        # Compare numerical columns
-        numerical_cols = original.select_dtypes(include=[np.number]).columns
+        # One independent job per column
+        metrics = dict(zip(original.numeric, TaskScheduler(self.config).map(compare, original.numeric)))
+        for col in original.categorical:
+            metrics[col] = {
+                'kind': 'categorical',
+                'total_variation': total_variation(original.counts[col], protected.counts[col]),
+                'original_categories': len(original.counts[col].counts),
+                'protected_categories': len(protected.counts[col].counts)
+            }
+        return metrics
+    
+    @staticmethod
+    def compare_correlations(original, protected):
+        """Difference of the correlation matrices of two dataset sketches"""
+        return correlation_difference(original.covariance, protected.covariance)
+    
+    def sketch_pair(self, original, protected):
+        """Sketches of both datasets, and PairedStats if they are row-aligned (else None)"""
+        numeric, categorical = self.similarity_columns(original, protected)
+        settings = self.config.get('utility') or {}
         
-        for col in numerical_cols:
-            if col in protected.columns and col != 'id':
-                # Mean difference
-                orig_mean = original[col].mean()
-                prot_mean = protected[col].mean()
-                mean_diff = abs(orig_mean - prot_mean) / orig_mean if orig_mean != 0 else 0
-                
-                # Correlation
-                if len(original) == len(protected):
-                    try:
-                        correlation, _ = pearsonr(original[col], protected[col])
-                    except:
-                        correlation = 0
-                else:
-                    correlation = 0
-                
-                results[col] = {
-                    'mean_difference': mean_diff,
-                    'correlation': correlation,
-                    'original_mean': orig_mean,
-                    'protected_mean': prot_mean
-                }
+        # The original sketch only depends on the original data
+        original_sketch = self._original_artifact(
+            original, 'sketch', lambda: self.sketch(original, numeric, categorical),
+            numeric=numeric, categorical=categorical,
+            k=settings.get('sketch_k', 400), seed=settings.get('random_state', 42)
+        )
+        protected_sketch = self.sketch(protected, numeric, categorical)
         
-        return results
+        # Row-wise correlation only makes sense for row-aligned datasets
+        paired = None
+        if len(original) == len(protected):
+            paired = {col: PairedStats().update(pd.to_numeric(original[col], errors='coerce'),
+                                                pd.to_numeric(protected[col], errors='coerce'))
+                      for col in numeric}
+        return original_sketch, protected_sketch, paired
     
+    @stage
+    def measure_statistical_similarity(self, original, protected, sketches=None):
+        """Measure statistical similarity between datasets
+        
+        ``sketches`` is the ``sketch_pair`` of the datasets when the caller
+        already built it.
+        """
+        return self.compare_sketches(*(sketches or self.sketch_pair(original, protected)))
+    
+    @stage
     def measure_ml_utility(self, original, protected):
-        """Measure ML utility by training simple models"""
+        """Measure ML utility by cross-validating models on both datasets
+        
+        Every configured (target, model) pair is evaluated with stratified
+        k-fold accuracy on the original and on the protected data (each
+        stratified-subsampled to ``max_rows``), plus train-on-protected,
+        test-on-original (TSTR) accuracy. The original-data scores are
+        cached. The top-level keys describe the first pair; ``models``
+        lists all of them.
+        """
         try:
-            from sklearn.model_selection import train_test_split
-            from sklearn.linear_model import LogisticRegression
-            from sklearn.metrics import accuracy_score
-            from sklearn.preprocessing import LabelEncoder
+            from sklearn.base import clone
+            from src import ml_utility
             
-            # Create a simple target variable (high income vs low income)
-            if 'income' in original.columns:
-                orig_target = (original['income'] > original['income'].median()).astype(int)
-                prot_target = (protected['income'] > protected['income'].median()).astype(int)
-                
-                # Use age and other numerical features
-                feature_cols = [col for col in original.select_dtypes(include=[np.number]).columns 
-                               if col not in ['id', 'income']]
+            settings = self.config.get('utility') or {}
+            targets = settings.get('targets') or {'income': 'median'}
+            models = settings.get('models') or ['logistic_regression']
+            folds = settings.get('folds', 5)
+            max_rows = settings.get('max_rows')
+            n_jobs = settings.get('n_jobs', 1)
+            seed = settings.get('random_state', 42)
+            max_categories = settings.get('max_categories', 20)
+            
+            results = []
+            for target, rule in targets.items():
+                if target not in original.columns or target not in protected.columns:
+                    continue
+                numeric, categorical = ml_utility.feature_columns(original, target, self.config, protected)
+                if not numeric and not categorical:
+                    continue
+                X_orig, y_orig = ml_utility.labelled(original, target, rule, numeric, categorical, max_rows, seed)
+                X_prot, y_prot = ml_utility.labelled(protected, target, rule, numeric, categorical, max_rows, seed)
+                if len(X_orig) <= 4 or len(X_prot) <= 4:  # Need minimum samples
+                    continue
                 
-                if len(feature_cols) > 0:
-                    X_orig = original[feature_cols].fillna(0)
-                    X_prot = protected[feature_cols].fillna(0)
+                for model in models:
+                    pipeline = ml_utility.build_pipeline(model, numeric, categorical, max_categories, seed)
+                    # The original-data scores only depend on the original data
+                    baseline = self._original_artifact(
+                        original, 'ml_baseline',
+                        lambda: ml_utility.evaluate(clone(pipeline), X_orig, y_orig, folds, n_jobs, seed),
+                        target=target, rule=rule, model=model, numeric=numeric, categorical=categorical,
+                        folds=folds, max_rows=max_rows, max_categories=max_categories, random_state=seed
+                    )
+                    protected_scores = ml_utility.evaluate(clone(pipeline), X_prot, y_prot, folds, n_jobs, seed)
+                    if baseline is None or protected_scores is None:
+                        continue
                     
-                    if len(X_orig) > 4 and len(X_prot) > 4:  # Need minimum samples
-                        # Train on original data
-                        X_train, X_test, y_train, y_test = train_test_split(
-                            X_orig, orig_target, test_size=0.3, random_state=42
-                        )
-                        
-                        model_orig = LogisticRegression(random_state=42)
-                        model_orig.fit(X_train, y_train)
-                        orig_accuracy = accuracy_score(y_test, model_orig.predict(X_test))
-                        
-                        # Train on protected data
-                        X_train_prot, X_test_prot, y_train_prot, y_test_prot = train_test_split(
-                            X_prot, prot_target, test_size=0.3, random_state=42
-                        )
-                        
-                        model_prot = LogisticRegression(random_state=42)
-                        model_prot.fit(X_train_prot, y_train_prot)
-                        prot_accuracy = accuracy_score(y_test_prot, model_prot.predict(X_test_prot))
-                        
-                        return {
-                            'original_accuracy': orig_accuracy,
-                            'protected_accuracy': prot_accuracy,
-                            'accuracy_loss': orig_accuracy - prot_accuracy,
-                            'utility_retention': prot_accuracy / orig_accuracy if orig_accuracy > 0 else 0
-                        }
+                    entry = {
+                        'target': target,
+                        'model': model,
+                        'original_accuracy': baseline['accuracy'],
+                        'original_accuracy_std': baseline['accuracy_std'],
+                        'protected_accuracy': protected_scores['accuracy'],
+                        'protected_accuracy_std': protected_scores['accuracy_std'],
+                        'original_fit_time': baseline['fit_time'],
+                        'protected_fit_time': protected_scores['fit_time'],
+                        'original_rows': baseline['rows'],
+                        'protected_rows': protected_scores['rows'],
+                        'folds': protected_scores['folds'],
+                    }
+                    if settings.get('tstr', True):
+                        tstr = ml_utility.train_and_test(clone(pipeline), X_prot, y_prot, X_orig, y_orig)
+                        entry['tstr_accuracy'] = tstr['accuracy']
+                        entry['tstr_fit_time'] = tstr['fit_time']
+                    entry['accuracy_loss'] = entry['original_accuracy'] - entry['protected_accuracy']
+                    entry['utility_retention'] = (entry['protected_accuracy'] / entry['original_accuracy']
+                                                  if entry['original_accuracy'] > 0 else 0)
+                    results.append(entry)
+            
+            if results:
+                primary = results[0]
+                return {
+                    'original_accuracy': primary['original_accuracy'],
+                    'protected_accuracy': primary['protected_accuracy'],
+                    'accuracy_loss': primary['accuracy_loss'],
+                    'utility_retention': primary['utility_retention'],
+                    'models': results
+                }
             
         except Exception as e:
             print(f"ML utility measurement failed: {e}")
+            record_error('UtilityMeasurer.measure_ml_utility', e)
         
         return {
             'original_accuracy': 0,
             'protected_accuracy': 0,
             'accuracy_loss': 0,
-            'utility_retention': 0
+            'utility_retention': 0,
+            'models': []
         }
     
-    def create_comparison_plots(self, original, protected):
-        """Create comparison plots"""
-        numerical_cols = original.select_dtypes(include=[np.number]).columns
-        numerical_cols = [col for col in numerical_cols if col != 'id']
+    @stage
+    def create_comparison_plots(self, original_sketch, protected_sketch):
+        """Render a comparison plot of every column as SVG, by column
         
-        if len(numerical_cols) > 0:
-            fig, axes = plt.subplots(1, len(numerical_cols), figsize=(15, 5))
-            if len(numerical_cols) == 1:
-                axes = [axes]
-            
-            for i, col in enumerate(numerical_cols):
-                if col in protected.columns:
-                    axes[i].hist(original[col], alpha=0.5, label='Original', bins=10)
-                    axes[i].hist(protected[col], alpha=0.5, label='Protected', bins=10)
-                    axes[i].set_title(f'{col} Distribution')
-                    axes[i].legend()
-            
-            plt.tight_layout()
-            plt.savefig('reports/comparison_plots.png')
-            plt.close()
+        Histograms are read off the dataset sketches rather than the rows,
+        and the plots are rendered in parallel and cached by content.
+        """
+        from src.plots import PlotRenderer, comparison_histograms
+        
+        settings = self.config.get('output') or {}
+        histograms = comparison_histograms(original_sketch, protected_sketch,
+                                           bins=settings.get('plot_bins', 30),
+                                           max_bars=settings.get('plot_max_categories', 20))
+        if self.plot_renderer is None:
+            self.plot_renderer = PlotRenderer(self.config, self.cache)
+        return self.plot_renderer.render(histograms)
     
+    @stage
     def generate_utility_report(self, original, protected):
         """Generate comprehensive utility report"""
-        statistical_results = self.measure_statistical_similarity(original, protected)
+        sketches = self.sketch_pair(original, protected)
+        statistical_results = self.measure_statistical_similarity(original, protected, sketches)
         ml_results = self.measure_ml_utility(original, protected)
         
-        # Create plots
-        try:
-            self.create_comparison_plots(original, protected)
-        except Exception as e:
-            print(f"Plot creation failed: {e}")
+        # Create plots (matplotlib is only imported when they are shown)
+        plots = {}
+        if self.plots_enabled():
+            try:
+                plots = self.create_comparison_plots(sketches[0], sketches[1])
+            except Exception as e:
+                print(f"Plot creation failed: {e}")
+                record_error('UtilityMeasurer.create_comparison_plots', e)
         
         return {
             'statistical_similarity': statistical_results,
-            'ml_utility': ml_results
+            'correlation_matrix': self.compare_correlations(sketches[0], sketches[1]),
+            'ml_utility': ml_results,
+            'plots': plots
         }
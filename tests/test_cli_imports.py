@@ -0,0 +1,29 @@
+"""Importing the CLI must not pull in the heavy optional dependencies.
+
+Each command imports the stage modules it needs, and those import
+sklearn, scipy, matplotlib, fpdf and seaborn inside the functions that use
+them. The imports are measured in a fresh interpreter by the benchmark
+harness, so modules this test process already loaded do not hide a
+regression.
+"""
+import pytest
+
+from benchmarks.run_benchmarks import import_time
+
+# pyarrow is left out: pandas imports it itself for its string dtype
+HEAVY_MODULES = {'sklearn', 'scipy', 'matplotlib', 'fpdf', 'seaborn'}
+# Well above a cold import of pandas, well below one of sklearn and matplotlib
+MAX_IMPORT_SECONDS = 1.5
+
+
+@pytest.mark.parametrize("module", ["main", "src.cli"])
+def test_import_skips_heavy_modules(module):
+    _, loaded = import_time(module)
+    assert not HEAVY_MODULES & set(loaded)
+
+
+@pytest.mark.parametrize("module", ["main", "src.cli"])
+def test_import_time(module):
+    # Best of three, so a busy machine does not fail the test
+    seconds = min(import_time(module)[0] for _ in range(3))
+    assert seconds < MAX_IMPORT_SECONDS